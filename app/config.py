@@ -16,8 +16,19 @@ def load_variable(name: str, default_value: str = None) -> str:
 
 
 APP_DEBUG = False
+try:
+    METRICS_INTERVAL = int(load_variable('METRICS_INTERVAL', '300'))
+except ValueError as e:
+    raise EnvironmentError(str(e))
 # Database
 DB_ENGINE = load_variable('DATABASE_ENGINE')
+try:
+    DB_WRITE_QUEUE_SIZE = int(load_variable('DB_WRITE_QUEUE_SIZE', '1000'))
+    DB_WRITE_BATCH_SIZE = int(load_variable('DB_WRITE_BATCH_SIZE', '50'))
+    SESSION_CACHE_SIZE = int(load_variable('SESSION_CACHE_SIZE', '1000'))
+    SESSION_CACHE_TTL = int(load_variable('SESSION_CACHE_TTL', '1800'))
+except ValueError as e:
+    raise EnvironmentError(str(e))
 # Telegram
 TOKEN = load_variable('BOT_TOKEN')
 # Api
@@ -25,11 +36,49 @@ API_HOST = load_variable('API_HOST')
 API_KEY = load_variable('API_KEY')
 API_LOCALE = load_variable('API_LOCALE', 'ru_RU')
 API_CURRENCY = load_variable('API_CURRENCY', 'RUB').upper()
+try:
+    API_POOL_SIZE = int(load_variable('API_POOL_SIZE', '10'))
+    API_CONNECT_TIMEOUT = float(load_variable('API_CONNECT_TIMEOUT', '3.05'))
+    API_READ_TIMEOUT = float(load_variable('API_READ_TIMEOUT', '15'))
+    API_MAX_WORKERS = int(load_variable('API_MAX_WORKERS', '4'))
+    API_CACHE_SIZE = int(load_variable('API_CACHE_SIZE', '1000'))
+    API_CACHE_TTL_LOCATIONS = int(
+        load_variable('API_CACHE_TTL_LOCATIONS', '86400'))
+    API_CACHE_TTL_SEARCH = int(load_variable('API_CACHE_TTL_SEARCH', '900'))
+    API_CACHE_TTL_PHOTOS = int(load_variable('API_CACHE_TTL_PHOTOS', '86400'))
+    API_RATE = float(load_variable('API_RATE', '5'))
+    API_RATE_BURST = float(load_variable('API_RATE_BURST', '5'))
+    API_RATE_RESERVE = float(load_variable('API_RATE_RESERVE', '2'))
+    API_RATE_LOCATIONS = float(load_variable('API_RATE_LOCATIONS', '0'))
+    API_RATE_SEARCH = float(load_variable('API_RATE_SEARCH', '0'))
+    API_RATE_PHOTOS = float(load_variable('API_RATE_PHOTOS', '0'))
+    API_DAILY_LIMIT = int(load_variable('API_DAILY_LIMIT', '0'))
+    API_MONTHLY_LIMIT = int(load_variable('API_MONTHLY_LIMIT', '0'))
+    API_RETRIES = int(load_variable('API_RETRIES', '2'))
+    API_RETRY_BACKOFF = float(load_variable('API_RETRY_BACKOFF', '0.5'))
+    API_RETRY_DEADLINE = float(load_variable('API_RETRY_DEADLINE', '20'))
+    API_BREAKER_THRESHOLD = int(load_variable('API_BREAKER_THRESHOLD', '5'))
+    API_BREAKER_RESET = float(load_variable('API_BREAKER_RESET', '30'))
+except ValueError as e:
+    raise EnvironmentError(str(e))
+API_CACHE_ENGINE = load_variable('API_CACHE_ENGINE', '')
 # Bot
 IMAGE_SUFFIX = load_variable('IMAGE_SUFFIX', 'g').lower()
 try:
     MAX_RESULTS = int(load_variable('MAX_RESULTS', '5'))
     MAX_PHOTOS = int(load_variable('MAX_PHOTOS', '5'))
     MAX_HISTORY = int(load_variable('MAX_HISTORY', '5'))
+    HISTORY_PAGE_SIZE = int(load_variable('HISTORY_PAGE_SIZE', '2'))
+    HISTORY_CACHE_SIZE = int(load_variable('HISTORY_CACHE_SIZE', '1000'))
+    PREFETCH_TTL = int(load_variable('PREFETCH_TTL', '300'))
+    NEGATIVE_CACHE_TTL = int(load_variable('NEGATIVE_CACHE_TTL', '86400'))
+    BESTDEAL_MAX_PAGES = int(load_variable('BESTDEAL_MAX_PAGES', '3'))
+    BESTDEAL_WEIGHTS = tuple(map(
+        float, load_variable('BESTDEAL_WEIGHTS', '1,1,1').split(',')))
+    if len(BESTDEAL_WEIGHTS) != 3:
+        raise ValueError(f'Invalid BESTDEAL_WEIGHTS {BESTDEAL_WEIGHTS}')
 except ValueError as e:
     raise EnvironmentError(str(e))
+BESTDEAL_RANK = load_variable('BESTDEAL_RANK', 'price').lower()
+if BESTDEAL_RANK not in ('price', 'distance', 'star_rating', 'score'):
+    raise EnvironmentError(f'Invalid BESTDEAL_RANK [{BESTDEAL_RANK}].')
@@ -1,4 +1,14 @@
+import atexit
+from collections import deque
+from copy import copy
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import wraps
 from datetime import date, timedelta
+from itertools import chain
+from threading import Event, Lock
+from time import monotonic
 from telebot.types import (
     ReplyKeyboardMarkup, CallbackQuery,
     InlineKeyboardMarkup, InlineKeyboardButton, InputMediaPhoto)
@@ -6,22 +16,47 @@ from telegram_bot_calendar import WMonthTelegramCalendar as TCal
 
 from app.app_logger import get_logger
 from app.config import (
-    API_LOCALE, API_CURRENCY, DB_ENGINE, MAX_HISTORY, MAX_RESULTS,
-    MAX_PHOTOS, IMAGE_SUFFIX)
+    API_LOCALE, API_CURRENCY, API_MAX_WORKERS, DB_ENGINE,
+    DB_WRITE_BATCH_SIZE, DB_WRITE_QUEUE_SIZE, HISTORY_CACHE_SIZE,
+    HISTORY_PAGE_SIZE, MAX_HISTORY,
+    MAX_RESULTS, MAX_PHOTOS, IMAGE_SUFFIX, METRICS_INTERVAL,
+    NEGATIVE_CACHE_TTL, PREFETCH_TTL,
+    SESSION_CACHE_SIZE, SESSION_CACHE_TTL)
 
 import bot.dialog as d
-from classes.basic import Hotel, HotelPhoto, Location
+from classes.basic import Hotel, HotelPhoto, Location, SearchResult
 from classes.database import DB
+from classes.history_cache import HistoryCache
 from classes.hotels_api import ApiSearchResult, HotelsApi
+from classes.location_index import LocationIndex
+from classes.metrics import Metrics, MetricsReporter
+from classes.session_cache import SessionCache
 from classes.tbot import ReplyMessage
 from classes.user_session import UserSession
+from classes.write_behind import WriteBehindQueue
 
 
 # initiate logger
 logger = get_logger(__name__)
+# periodic logging of all metrics, the last one after other exit handlers
+metrics_reporter = MetricsReporter(METRICS_INTERVAL)
+atexit.register(metrics_reporter.close)
 # initiate database and api
-db = DB(DB_ENGINE)
-api = HotelsApi()
+db = DB(DB_ENGINE, SessionCache(SESSION_CACHE_SIZE, SESSION_CACHE_TTL))
+# background saving of search results, flushed on exit
+write_queue = WriteBehindQueue(db, DB_WRITE_QUEUE_SIZE, DB_WRITE_BATCH_SIZE)
+atexit.register(write_queue.close)
+api = HotelsApi(usage_storage=db)
+atexit.register(api.close)
+# rendered history of completed sessions
+history_cache = HistoryCache(HISTORY_CACHE_SIZE, MAX_HISTORY)
+# in-memory typo tolerant index of database locations
+location_index = LocationIndex(db.get_locations())
+# bounded executor for Api requests shared by all bot threads
+executor = ThreadPoolExecutor(max_workers=API_MAX_WORKERS)
+# executor for search prefetch
+prefetch_executor = ThreadPoolExecutor(max_workers=API_MAX_WORKERS)
+metrics = Metrics(__name__)
 # fix constants
 BTN_MAX = 3  # max button number in ReplyKeyboard
 UNITS = {
@@ -36,6 +71,10 @@ PHOTOS_SHOW_BTNS = {
     'да': 1,
     'нет': 0
 }
+# history callbacks data prefixes
+HISTORY_MORE = 'history_more'
+HISTORY_PHOTOS = 'history_photos'
+HISTORY_CALLBACKS = (HISTORY_MORE, HISTORY_PHOTOS)
 
 
 # dialogs
@@ -52,20 +91,34 @@ def _get_dialog(attr_name: str, placeholder: list | tuple = None) -> str:
 
 
 def _display_api_search_result(
-        session: UserSession, result: ApiSearchResult) -> ReplyMessage:
-    """Return ReplyMessage by ApiSearchResult instance."""
+        session: UserSession, result: ApiSearchResult,
+        photos: list[HotelPhoto] = None,
+        photos_button: bool = False) -> ReplyMessage:
+    """
+    Return ReplyMessage by ApiSearchResult instance.
+    Hotel photos are loaded if photos is None.
+    Button loading hotel photos on demand is shown instead of them
+    if photos_button.
+    """
     placeholder = [
         result.hotel.name, '⭐' * result.hotel.star_rating,
         result.hotel.address,
         result.hotel.distance, 'км',
         result.search_result.price, API_CURRENCY
     ]
-    photos = []
-    if session.photos_num > 0:
-        photos = _get_hotel_photos(result.hotel, session.photos_num)
+    if photos_button:
+        photos = []
+    elif photos is None:
+        photos = []
+        if session.photos_num > 0:
+            photos = _get_hotel_photos(result.hotel, session.photos_num)
     markup = InlineKeyboardMarkup(row_width=1)
     markup.add(InlineKeyboardButton(
         d.HOTEL_BOOK, url=result.search_result.url))
+    if photos_button and session.photos_num > 0:
+        markup.add(InlineKeyboardButton(
+            d.HISTORY_PHOTOS_BTN, callback_data=(
+                f'{HISTORY_PHOTOS}:{result.hotel.id}:{session.photos_num}')))
     media = None
     if len(photos) > 0:
         media = [InputMediaPhoto(
@@ -76,26 +129,83 @@ def _display_api_search_result(
 
 
 # Api and database unify methods
+def _is_negative_result(kind: str, key: str) -> bool:
+    """Return True if Api lookup of kind by key had no results recently."""
+    if NEGATIVE_CACHE_TTL <= 0:
+        return False
+    if db.get_negative_result(kind, key):
+        metrics.incr(f'{kind} negative hits')
+        return True
+    return False
+
+
+def _add_negative_result(kind: str, key: str) -> None:
+    """Save empty Api lookup result of kind by key."""
+    if NEGATIVE_CACHE_TTL <= 0:
+        return None
+    metrics.incr(f'{kind} negative added')
+    if not db.add_negative_result(kind, key, NEGATIVE_CACHE_TTL):
+        logger.debug('_add_negative_result error.')
+
+
 def _get_locations(location_name: str, limit: int = 0) -> list[Location]:
-    """Return Location instances list by database and Api responces."""
+    """
+    Return Location instances list by database and Api responces.
+    Transliterated names are matched by location index before Api request.
+    Names without Api results are not requested again
+    for NEGATIVE_CACHE_TTL seconds.
+    """
     # search in database
     locations = db.get_locations_byname(location_name, limit)
+    if len(locations) > 0:
+        return locations
+    # search in location index, misspelled names can be other locations
+    locations = location_index.search(location_name, limit, fuzzy=False)
     if len(locations) > 0:
         return locations
     # search by Api
-    locations = api.get_locations(location_name)
+    key = location_name.lower().strip()
+    if _is_negative_result('locations', key):
+        return []
+    try:
+        locations = api.get_locations(location_name, strict=True)
+    except (api.ApiRequestError, api.ApiParseError):
+        return []
     if len(locations) == 0:
+        _add_negative_result('locations', key)
         return []
     # save locations to database
     for location in locations:
         if not db.add_location(location):
             logger.debug('_get_locations error.')
+        location_index.add(location)
     # return locations
     if 0 < limit < len(locations):
         return locations[:limit]
     return locations
 
 
+def _request_hotel_photos(
+        hotel: Hotel, limit: int = 0) -> tuple[list[HotelPhoto], list]:
+    """
+    Return HotelPhoto instances list limited by limit
+    and full HotelPhoto instances list by Api responce.
+    Hotels without photos are not requested again
+    for NEGATIVE_CACHE_TTL seconds.
+    """
+    if _is_negative_result('photos', str(hotel.id)):
+        return [], []
+    try:
+        photos = api.get_hotel_photos(hotel, limit=0, strict=True)
+    except (api.ApiRequestError, api.ApiParseError):
+        return [], []
+    if len(photos) == 0:
+        _add_negative_result('photos', str(hotel.id))
+    if 0 < limit < len(photos):
+        return photos[:limit], photos
+    return photos, photos
+
+
 def _get_hotel_photos(hotel: Hotel, limit: int = 0) -> list[HotelPhoto]:
     """Return HotelPhoto instances list by database and Api responces."""
     # search in database
@@ -103,18 +213,127 @@ def _get_hotel_photos(hotel: Hotel, limit: int = 0) -> list[HotelPhoto]:
     if len(photos) > 0:
         return photos
     # search by Api
-    photos = api.get_hotel_photos(hotel, limit=0)
-    if len(photos) == 0:
+    photos, new_photos = _request_hotel_photos(hotel, limit)
+    if len(new_photos) == 0:
         return []
     # save hotel photos to database
-    if not db.add_hotel_photos(hotel, photos):
+    if not db.add_hotel_photos(hotel, new_photos):
         logger.debug('_get_hotel_photos error.')
-    # return photos
-    if 0 < limit < len(photos):
-        return photos[:limit]
     return photos
 
 
+def _submit_hotel_photos(hotel: Hotel, limit: int) -> Future:
+    """
+    Return Future with HotelPhoto instances list and new HotelPhoto
+    instances list to save in database.
+    Database is searched in caller thread, Api requests run in executor.
+    """
+    if limit > 0:
+        photos = db.get_hotel_photos(hotel, limit)
+        if len(photos) == 0:
+            return executor.submit(_request_hotel_photos, hotel, limit)
+    else:
+        photos = []
+    future = Future()
+    future.set_result((photos, []))
+    return future
+
+
+# Search prefetch
+@dataclass
+class _Prefetch:
+    """Search started in background for UserSession."""
+    session_id: int
+    started: float = field(default_factory=monotonic)
+    cancelled: Event = field(default_factory=Event)
+    future: Future = None
+
+    @property
+    def expired(self) -> bool:
+        """Return True if prefetch is older than PREFETCH_TTL."""
+        return monotonic() - self.started > PREFETCH_TTL
+
+
+_prefetches: dict[int, _Prefetch] = {}
+_prefetches_lock = Lock()
+
+
+def _prefetch_search(
+        prefetch: _Prefetch, session: UserSession) -> list[ApiSearchResult]:
+    """Return ApiSearchResult instances list. Stop on prefetch cancel."""
+    results = []
+    search_results = api.iter_search_results(session, prefetch.cancelled)
+    for result in search_results:
+        if prefetch.cancelled.is_set():
+            search_results.close()
+            break
+        results.append(result)
+    return results
+
+
+def _expire_prefetches() -> None:
+    """Cancel expired prefetches and forget their results."""
+    with _prefetches_lock:
+        expired = [
+            chat_id for chat_id, x in _prefetches.items() if x.expired]
+    for chat_id in expired:
+        _cancel_prefetch(chat_id)
+        metrics.incr('prefetch expired')
+
+
+def _cancel_prefetch(chat_id: int) -> None:
+    """Cancel search prefetch by chat_id."""
+    with _prefetches_lock:
+        prefetch = _prefetches.pop(chat_id, None)
+    if prefetch is not None:
+        prefetch.cancelled.set()
+        prefetch.future.cancel()
+        metrics.incr('prefetch cancelled')
+
+
+def _start_prefetch(session: UserSession) -> None:
+    """Start search in background. Expired prefetches are cancelled."""
+    if PREFETCH_TTL <= 0:
+        return None
+    prefetch = _Prefetch(session.id)
+    _expire_prefetches()
+    _cancel_prefetch(session.chat_id)
+    prefetch.future = prefetch_executor.submit(
+        _prefetch_search, prefetch, session)
+    with _prefetches_lock:
+        _prefetches[session.chat_id] = prefetch
+    metrics.incr('prefetch started')
+
+
+def _iter_search_results(session: UserSession) -> Iterable[ApiSearchResult]:
+    """
+    Return prefetched ApiSearchResult instances or search by Api.
+    Prefetch still waiting in executor queue is cancelled
+    and search is run at once. Expired prefetches of all chats
+    are forgotten.
+    """
+    _expire_prefetches()
+    with _prefetches_lock:
+        prefetch = _prefetches.pop(session.chat_id, None)
+    if prefetch is not None and prefetch.session_id == session.id and \
+            not prefetch.expired and not prefetch.future.cancelled():
+        if prefetch.future.cancel():
+            prefetch.cancelled.set()
+            metrics.incr('prefetch queued')
+            return api.iter_search_results(session)
+        try:
+            results = prefetch.future.result()
+            metrics.incr('prefetch used')
+            return results
+        except Exception as e:
+            logger.error(f'_iter_search_results prefetch error [{e}]')
+    elif prefetch is not None:
+        prefetch.cancelled.set()
+        prefetch.future.cancel()
+        metrics.incr('prefetch expired')
+    return api.iter_search_results(session)
+
+
 # Session methods
 def _get_session_bychatid(chat_id: int, command: str = None) -> UserSession:
     """
@@ -128,6 +347,7 @@ def _get_session_bychatid(chat_id: int, command: str = None) -> UserSession:
     if command is None:
         logger.warning(f'_get_session_bychatid error: [{chat_id} {command}]')
         return None
+    _cancel_prefetch(chat_id)
     session_attrs = {'command': command}
     session = UserSession(chat_id, **session_attrs)
     return db.add_session(session)
@@ -137,6 +357,7 @@ def _update_session_byvalue(
         session: UserSession, value: object) -> UserSession:
     """
     Return updated by value UserSession instance.
+    Change is saved to database by _save_session.
     Raise ValueError on update failed.
     """
     current_step = session.current_step
@@ -145,65 +366,79 @@ def _update_session_byvalue(
     if len(updated_attrs) == 0:
         logger.warning(f"update_session error: {session.chat_id} {str(value)}")
         raise ValueError(attrs)
-    return db.update_session(session, updated_attrs)
+    return session
 
 
-def _finish_session(session: UserSession) -> None:
-    """Finish active user session."""
-    session = db.update_session(session, {'complete': True})
-    if session is not None:
-        logger.error(f'_finish_session error [{session}]')
+def _save_session(session: UserSession) -> None:
+    """
+    Save UserSession attributes changed by update in one query.
+    Start search prefetch if search parameters are complete.
+    """
+    changes = session.pop_changes()
+    if len(changes) == 0:
+        return None
+    if db.update_session(session, changes, reload=False) is None:
+        logger.error(f'_save_session error [{session.chat_id} {changes}]')
+        return None
+    if 'results_num' in changes:
+        _start_prefetch(copy(session))
 
 
-def _get_results(session: UserSession) -> list[ReplyMessage]:
-    """Return list of ReplyMessage instances with results."""
-    chat_id = session.chat_id
-    # check is session's attributes are filled
+def _pop_result_reply(
+        session: UserSession, pending: deque,
+        new_photos: dict[Hotel, list[HotelPhoto]]) -> ReplyMessage:
     """
-    try:
-         session.__getattribute__(session.attrs.keys()[-1])
-    except AttributeError:
-        return [ReplyMessage(chat_id, d.UNKNOWN_ERROR, next_handler=False)]
+    Return ReplyMessage for first pending ApiSearchResult instance.
+    Wait for its photos.
     """
-    api_search_results = api.get_search_results(session)
-    if len(api_search_results) == 0:
-        _finish_session(session)
-        return [ReplyMessage(chat_id, d.COMPLETE_WRONG, next_handler=False)]
-    replies = [ReplyMessage(chat_id, _get_dialog(
-        'COMPLETE_START', [len(api_search_results)]), next_handler=False)]
-    for result in api_search_results:
-        # save hotel and search reslut to datebase
-        result.add_session(session)
-        db.add_hotel(result.hotel)
-        db.add_search_result(result.search_result)
-        # placeholder
-        replies.append(_display_api_search_result(session, result))
-    _finish_session(session)
-    return replies
+    result, future = pending.popleft()
+    photos, fetched_photos = future.result()
+    if len(fetched_photos) > 0:
+        new_photos[result.hotel] = fetched_photos
+    return _display_api_search_result(session, result, photos)
 
 
-# skipers
-def _skip_attrs(session: UserSession) -> None:
-    """Fill some attributes by 0 by command."""
-    skip_commands = ('/lowprice', '/highprice')
-    skip_steps = {
-        'price_min': 0.0,
-        'price_max': 0.0,
-        'distance_min': 0.0,
-        'distance_max': 0.0,
-    }
-    if session.command in skip_commands:
-        chat_id = session.chat_id
-        session = _get_session_bychatid(chat_id)
-        if session.current_step in skip_steps.keys():
-            for _, value in skip_steps.items():
-                try:
-                    session = _update_session_byvalue(session, value)
-                except ValueError as e:
-                    logger.warning((
-                        '_skip_attrs error '
-                        f"[{' '.join(map(str, *e.args))}]"
-                    ))
+def _get_results(session: UserSession) -> Iterator[ReplyMessage]:
+    """
+    Yield ReplyMessage instances with results as soon as they are ready.
+    Results order is kept.
+    """
+    chat_id = session.chat_id
+    results_count = 0
+    pending = deque()
+    hotels = []
+    search_results = []
+    new_photos = {}
+    try:
+        for result in _iter_search_results(session):
+            results_count += 1
+            result.add_session(session)
+            hotels.append(result.hotel)
+            search_results.append(result.search_result)
+            pending.append((result, _submit_hotel_photos(
+                result.hotel, session.photos_num)))
+            # send ready results
+            while len(pending) > 0 and pending[0][1].done():
+                yield _pop_result_reply(session, pending, new_photos)
+        while len(pending) > 0:
+            yield _pop_result_reply(session, pending, new_photos)
+    finally:
+        # finish session at once, next message starts new one
+        if db.update_session(
+                session, {'complete': True}, reload=False) is None:
+            logger.error(f'_get_results error [{session}]')
+        # save hotels, search results and photos in background
+        uow = db.unit_of_work()
+        uow.add_hotels(hotels)
+        uow.add_search_results(search_results)
+        uow.add_hotels_photos(new_photos)
+        write_queue.put(uow, chat_id)
+        _add_history_entry(session, hotels, search_results)
+    if results_count == 0:
+        yield ReplyMessage(chat_id, d.COMPLETE_WRONG, next_handler=False)
+    else:
+        yield ReplyMessage(chat_id, _get_dialog(
+            'COMPLETE_START', [results_count]), next_handler=False)
 
 
 # starts
@@ -223,10 +458,12 @@ def _gen_calendar(session: UserSession) -> TCal:
         locale=API_LOCALE.split('_')[0])
 
 
-def _starts(session: UserSession) -> list[ReplyMessage]:
-    """Return list of ReplyMessage instances by session."""
+def _starts(session: UserSession) -> Iterable[ReplyMessage]:
+    """
+    Return list of ReplyMessage instances by session.
+    Results are returned by iterator.
+    """
     chat_id = session.chat_id
-    session = _get_session_bychatid(chat_id)
     current_step = session.current_step
     text = _get_dialog(f'{current_step}_START')
     match current_step:
@@ -271,6 +508,11 @@ def _process_location_id(
         session: UserSession, message: str) -> list[ReplyMessage]:
     """Return list of ReplyMessage instances for location_id."""
     locations = _get_locations(message, BTN_MAX)
+    clarify = False
+    if len(locations) == 0:
+        # similar names are offered, not selected
+        locations = location_index.search(message, BTN_MAX)
+        clarify = True
     # check :64 symbols equals
     for location in locations:
         if location.caption[:64] == message:
@@ -283,12 +525,12 @@ def _process_location_id(
             # no results
             return [ReplyMessage(chat_id, _get_dialog(
                 f'{attr_name}_WRONG'), next_handler=False)]
-        case 1:
+        case 1 if not clarify:
             # one result
             location = locations[0]
             return _process_main(session, location.destination_id)
         case _:
-            # more that one result
+            # more that one result or similar names
             markup = ReplyKeyboardMarkup(
                 one_time_keyboard=True, row_width=min(BTN_MAX, len(locations)))
             for location in locations:
@@ -339,26 +581,57 @@ def _process_user_message(
             reply_messages = _process_photos_show(session, value)
         case _:
             reply_messages = _process_main(session, value)
-    session = _get_session_bychatid(session.chat_id)
-    _skip_attrs(session)
+    _save_session(session)
     return reply_messages
 
 
 # main functions
-def command_replies(chat_id: int, command: str) -> list[ReplyMessage]:
-    """Return list of ReplyMessages by command."""
+def _observe_queries(func: Callable) -> Callable:
+    """
+    Observe number of database queries by func call in metrics.
+    Lazy replies are observed when they are iterated to the end.
+    """
+    def observe(start: int) -> None:
+        metrics.observe('queries per update', db.queries - start)
+
+    def iter_replies(
+            replies: Iterable[ReplyMessage],
+            start: int) -> Iterator[ReplyMessage]:
+        try:
+            yield from replies
+        finally:
+            observe(start)
+
+    @wraps(func)
+    def wrapper(*args, **kwargs) -> Iterable[ReplyMessage]:
+        start = db.queries
+        try:
+            replies = func(*args, **kwargs)
+        except Exception:
+            observe(start)
+            raise
+        if isinstance(replies, (list, tuple)):
+            observe(start)
+            return replies
+        return iter_replies(replies, start)
+    return wrapper
+
+
+@_observe_queries
+def command_replies(chat_id: int, command: str) -> Iterable[ReplyMessage]:
+    """Return ReplyMessages by command."""
     session = _get_session_bychatid(chat_id, command)
     if session is None:
         return [ReplyMessage(chat_id, d.ERROR_CONTENT, next_handler=False)]
     command = command.replace('/', '')
     replies = [ReplyMessage(chat_id, _get_dialog(
         f'COMMAND_{command}'), next_handler=False)]
-    replies += _starts(session)
-    return replies
+    return chain(replies, _starts(session))
 
 
-def message_replies(chat_id: int, message: str) -> list[ReplyMessage]:
-    """Return list of ReplyMessages by message."""
+@_observe_queries
+def message_replies(chat_id: int, message: str) -> Iterable[ReplyMessage]:
+    """Return ReplyMessages by message."""
     session = _get_session_bychatid(chat_id)
     if session is None:
         return [ReplyMessage(chat_id, d.ERROR_CONTENT, next_handler=False)]
@@ -366,13 +639,13 @@ def message_replies(chat_id: int, message: str) -> list[ReplyMessage]:
     if len(replies) > 0:
         if replies[-1].clarify:
             return replies
-    replies += _starts(session)
-    return replies
+    return chain(replies, _starts(session))
 
 
+@_observe_queries
 def callback_replies(
-        chat_id: int, callback: CallbackQuery) -> list[ReplyMessage]:
-    """Return list of ReplyMessages by callback."""
+        chat_id: int, callback: CallbackQuery) -> Iterable[ReplyMessage]:
+    """Return ReplyMessages by callback."""
     session = _get_session_bychatid(chat_id)
     if session is None:
         return [ReplyMessage(chat_id, d.ERROR_CONTENT, next_handler=False)]
@@ -392,42 +665,168 @@ def callback_replies(
     if len(replies) > 0:
         if replies[-1].clarify:
             return replies
-    session = _get_session_bychatid(chat_id)
-    replies += _starts(session)
+    return chain(replies, _starts(session))
+
+
+def _display_history_entry(
+        session: UserSession, location: Location,
+        results: list[tuple[Hotel, SearchResult]]
+) -> tuple[ReplyMessage, ...]:
+    """
+    Return history entry of completed UserSession as tuple
+    of ReplyMessage instances. Hotel photos are loaded on demand by buttons.
+    """
+    chat_id = session.chat_id
+    min_placeholder = ''
+    price_attrs = [session.price_min, session.price_max]
+    distance_attrs = [session.distance_min, session.distance_max]
+    if sum(price_attrs) + sum(distance_attrs) > 0:
+        min_placeholder = _get_dialog(
+            'USER_SESSION_FLOATS',
+            price_attrs + [API_CURRENCY] + distance_attrs + ['км'])
+    placeholder = [
+        session.query_time.strftime('%d.%m.%Y %H:%M:%S'),
+        session.command.replace('/', ''),
+        location.caption if location is not None else '',
+        session.check_in.strftime('%d.%m.%Y'),
+        session.check_out.strftime('%d.%m.%Y'),
+        min_placeholder,
+        session.results_num,
+        session.photos_num
+    ]
+    replies = [ReplyMessage(chat_id, _get_dialog(
+        'USER_SESSION', placeholder), next_handler=False)]
+    for hotel, result in results:
+        api_search_result = ApiSearchResult(
+            hotel.id, hotel.name, hotel.address, hotel.star_rating,
+            hotel.distance, result.price)
+        api_search_result.add_session(session)
+        replies.append(_display_api_search_result(
+            session, api_search_result, photos_button=True))
+    return tuple(replies)
+
+
+def _load_history_entries(
+        chat_id: int, limit: int,
+        offset: int = 0) -> list[tuple[ReplyMessage, ...]]:
+    """Return history entries of chat by database."""
+    # search results of chat can be waiting in write queue
+    write_queue.flush(chat_id=chat_id)
+    return [
+        _display_history_entry(*x)
+        for x in db.get_history(chat_id, limit, offset)]
+
+
+def _get_history_entries(chat_id: int) -> list[tuple[ReplyMessage, ...]]:
+    """
+    Return up to MAX_HISTORY history entries of chat by history cache.
+    Entries are loaded and cached on miss.
+    None if history cache is disabled.
+    """
+    if not history_cache.enabled:
+        return None
+    entries = history_cache.get(chat_id)
+    if entries is None:
+        lease = history_cache.lease(chat_id)
+        entries = _load_history_entries(chat_id, MAX_HISTORY)
+        history_cache.set(chat_id, entries, lease)
+    return entries
+
+
+def _add_history_entry(
+        session: UserSession, hotels: list[Hotel],
+        search_results: list[SearchResult]) -> None:
+    """Add completed UserSession entry to cached history of chat."""
+    if session.chat_id not in history_cache:
+        return None
+    try:
+        location = db.get_location_byid(session.location_id)
+        entry = _display_history_entry(
+            session, location, list(zip(hotels, search_results)))
+    except AttributeError:
+        logger.error(f'_add_history_entry error [{session}]')
+        history_cache.delete(session.chat_id)
+        return None
+    history_cache.add(session.chat_id, entry)
+
+
+def _get_history_page(chat_id: int, offset: int) -> list[ReplyMessage]:
+    """
+    Return list of ReplyMessage instances with completed UserSession results
+    skipping offset last sessions. Page is limited by HISTORY_PAGE_SIZE
+    sessions and ends with button of the next page if it exists.
+    """
+    limit = HISTORY_PAGE_SIZE
+    if MAX_HISTORY > 0:
+        limit = min(limit, MAX_HISTORY - offset)
+    if limit <= 0:
+        return []
+    entries = _get_history_entries(chat_id)
+    if entries is not None:
+        more = len(entries) > offset + limit
+        entries = entries[offset:offset + limit]
+    else:
+        # one more session shows if next page exists
+        more = MAX_HISTORY <= 0 or offset + limit < MAX_HISTORY
+        entries = _load_history_entries(chat_id, limit + int(more), offset)
+        more = len(entries) > limit
+        entries = entries[:limit]
+    replies = list(chain.from_iterable(entries))
+    if more:
+        markup = InlineKeyboardMarkup(row_width=1)
+        markup.add(InlineKeyboardButton(
+            d.HISTORY_MORE_BTN,
+            callback_data=f'{HISTORY_MORE}:{offset + limit}'))
+        replies.append(ReplyMessage(
+            chat_id, _get_dialog('HISTORY_MORE', [offset + limit]),
+            markup=markup, next_handler=False))
     return replies
 
 
 def get_user_history(chat_id: int) -> list[ReplyMessage]:
     """
-    Return list of ReplyMessage instances with completed UserSession results.
-    """
-    replies = []
-    for session in db.get_sessions(chat_id, MAX_HISTORY):
-        min_placeholder = ''
-        price_attrs = [session.price_min, session.price_max]
-        distance_attrs = [session.distance_min, session.distance_max]
-        if sum(price_attrs) + sum(distance_attrs) > 0:
-            min_placeholder = _get_dialog(
-                'USER_SESSION_FLOATS',
-                price_attrs + [API_CURRENCY] + distance_attrs + ['км'])
-        placeholder = [
-            session.query_time.strftime('%d.%m.%Y %H:%M:%S'),
-            session.command.replace('/', ''),
-            db.get_location_byid(session.location_id).caption,
-            session.check_in.strftime('%d.%m.%Y'),
-            session.check_out.strftime('%d.%m.%Y'),
-            min_placeholder,
-            session.results_num,
-            session.photos_num
-        ]
-        replies.append(ReplyMessage(chat_id, _get_dialog(
-            'USER_SESSION', placeholder), next_handler=False))
-        for result in db.get_search_results(session):
-            hotel = db.get_hotel_byid(result.hotel_id)
-            api_search_result = ApiSearchResult(
-                hotel.id, hotel.name, hotel.address, hotel.star_rating,
-                hotel.distance, result.price)
-            api_search_result.add_session(session)
-            replies.append(_display_api_search_result(
-                session, api_search_result))
-    return replies
+    Return list of ReplyMessage instances with the first page
+    of completed UserSession results.
+    """
+    return _get_history_page(chat_id, 0)
+
+
+def _get_history_photos(
+        chat_id: int, hotel_id: int, limit: int) -> list[ReplyMessage]:
+    """Return list of ReplyMessage instances with history hotel photos."""
+    hotel = db.get_hotel_byid(hotel_id)
+    if hotel is None and write_queue.flush(chat_id=chat_id):
+        # cached history hotel can be waiting in write queue
+        hotel = db.get_hotel_byid(hotel_id)
+    if hotel is None:
+        return [ReplyMessage(chat_id, d.UNKNOWN_ERROR, next_handler=False)]
+    photos = _get_hotel_photos(hotel, min(limit, MAX_PHOTOS))
+    if len(photos) == 0:
+        return [ReplyMessage(
+            chat_id, _get_dialog('HISTORY_PHOTOS_WRONG', [hotel.name]),
+            next_handler=False)]
+    return [ReplyMessage(
+        chat_id, _get_dialog('HISTORY_PHOTOS', [hotel.name]),
+        media=[InputMediaPhoto(x.formated_url(IMAGE_SUFFIX)) for x in photos],
+        next_handler=False)]
+
+
+@_observe_queries
+def history_callback_replies(
+        chat_id: int, callback: CallbackQuery) -> list[ReplyMessage]:
+    """Return ReplyMessages by history callback."""
+    try:
+        name, *values = callback.data.split(':')
+        values = [int(x) for x in values]
+        if name == HISTORY_MORE and len(values) == 1:
+            # remove button of shown page
+            replies = [ReplyMessage(
+                chat_id, _get_dialog('HISTORY_MORE', values),
+                next_handler=False, edit_message_id=callback.message.id)]
+            return replies + _get_history_page(chat_id, values[0])
+        if name == HISTORY_PHOTOS and len(values) == 2:
+            return _get_history_photos(chat_id, *values)
+    except ValueError:
+        pass
+    logger.error(f'history_callback_replies error {callback.data}')
+    return [ReplyMessage(chat_id, d.UNKNOWN_ERROR, next_handler=False)]
@@ -0,0 +1,5 @@
+"""
+Benchmarks of hot paths. Run from repository root, e.g.
+python -m bench.db_queries
+Settings are read from environment as by application.
+"""
@@ -0,0 +1,111 @@
+"""
+Database throughput under concurrent bot load:
+reads during long write batches and mixed load by worker threads.
+
+python -m bench.db_concurrency [scale]
+"""
+import random
+import shutil
+import sys
+from threading import Event, Thread
+from time import perf_counter, sleep
+
+from bench.fixtures import build_database, temp_engine
+from classes.database import DB
+from classes.user_session import UserSession
+
+
+DURATION = 3.0
+WRITE_BATCH = 20000
+
+
+def reads_during_writes(db: DB, readers: int, chats: int) -> None:
+    """Print reads rate and latency while writer saves long batches."""
+    stop = Event()
+    latencies = [[] for _ in range(readers)]
+
+    def writer() -> None:
+        id = 10 ** 7
+        while not stop.is_set():
+            db._update_batch([(
+                "INSERT INTO photos VALUES (?, ?, ?)",
+                [[id + i, i, 'url'] for i in range(WRITE_BATCH)])])
+            id += WRITE_BATCH
+
+    def reader(latency: list[float]) -> None:
+        r = random.Random()
+        while not stop.is_set():
+            start = perf_counter()
+            db.get_active_session(r.randrange(chats))
+            latency.append(perf_counter() - start)
+
+    threads = [Thread(target=writer)] + [
+        Thread(target=reader, args=(x,)) for x in latencies]
+    _run(threads, stop)
+    values = sorted(x for latency in latencies for x in latency)
+    print(
+        f'  {readers} readers: {len(values) / DURATION:8.0f} reads/s'
+        f', p99 {values[int(len(values) * 0.99)] * 1000:6.2f} ms'
+        f', max {values[-1] * 1000:6.1f} ms')
+
+
+def mixed_load(db: DB, workers: int, chats: int, sessions: int) -> None:
+    """
+    Print operations rate of workers: 10% add_session,
+    the rest sessions, results and locations reads.
+    """
+    stop = Event()
+    counts = [0] * workers
+
+    def worker(idx: int) -> None:
+        r = random.Random(idx)
+        while not stop.is_set():
+            x = r.random()
+            if x < 0.1:
+                db.add_session(UserSession(
+                    r.randrange(10 ** 6, 2 * 10 ** 6), command='/lowprice'))
+            elif x < 0.4:
+                db.get_active_session(r.randrange(chats))
+            elif x < 0.7:
+                db.get_search_results(UserSession(
+                    1, command='/lowprice', id=r.randrange(sessions)))
+            elif x < 0.9:
+                db.get_sessions(r.randrange(chats), 5)
+            else:
+                db.get_locations_byname(f'city{r.randrange(100)}', 3)
+            counts[idx] += 1
+
+    _run([Thread(target=worker, args=(i,)) for i in range(workers)], stop)
+    print(f'  {workers} workers: {sum(counts) / DURATION:8.0f} ops/s')
+
+
+def _run(threads: list[Thread], stop: Event) -> None:
+    """Run threads for DURATION."""
+    for thread in threads:
+        thread.start()
+    sleep(DURATION)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+
+def main(scale: float) -> None:
+    base = temp_engine()
+    print(f'building database, scale {scale}...')
+    build_database(base, scale=scale)
+    sessions = int(200000 * scale)
+    chats = max(sessions // 10, 1)
+    print('reads during long writes:')
+    for readers in (1, 4):
+        engine = temp_engine()
+        shutil.copy(base, engine)
+        reads_during_writes(DB(engine), readers, chats)
+    print('mixed load:')
+    for workers in (1, 2, 4, 8):
+        engine = temp_engine()
+        shutil.copy(base, engine)
+        mixed_load(DB(engine), workers, chats, sessions)
+
+
+if __name__ == '__main__':
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 1.0)
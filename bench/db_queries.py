@@ -0,0 +1,70 @@
+"""
+Query plans and timings of hot database reads before and after
+hot-path indexes migration (version 4 and the last version).
+
+python -m bench.db_queries [scale]
+"""
+import shutil
+import sys
+from time import perf_counter
+
+from bench.fixtures import build_database, db_class, temp_engine
+from classes.basic import Hotel
+from classes.database import DB
+from classes.user_session import UserSession
+
+
+BASE_VERSION = 4
+REPEAT = 50
+
+
+def queries(db: DB) -> dict[str, tuple[str, list, callable]]:
+    """Return plan query, its values and DB call by name."""
+    session = UserSession(1, command='/lowprice', id=1234)
+    hotel = Hotel(777, 'Hotel', 'Street, 1', 3, 1.0)
+    return {
+        'get_active_session': (
+            "SELECT id FROM sessions WHERE chat_id = ? AND complete IS FALSE",
+            [5], lambda: db.get_active_session(5)),
+        'get_sessions': (
+            "SELECT id FROM sessions WHERE chat_id = ? AND complete IS TRUE"
+            " ORDER BY query_time DESC LIMIT 5",
+            [5], lambda: db.get_sessions(5, 5)),
+        'get_search_results': (
+            "SELECT id FROM results WHERE session_id = ?",
+            [session.id], lambda: db.get_search_results(session)),
+        'get_hotel_photos': (
+            "SELECT id FROM photos WHERE hotel_id = ? ORDER BY id",
+            [hotel.id], lambda: db.get_hotel_photos(hotel, 5)),
+        'get_locations_byname': (
+            "SELECT destination_id FROM locations WHERE name_lower = ?",
+            ['city4242'], lambda: db.get_locations_byname('city4242', 3)),
+    }
+
+
+def run(db: DB) -> None:
+    """Print plan and average time of every query."""
+    for name, (q, v, call) in queries(db).items():
+        plan = '; '.join(
+            row[3] for row in db._conn.execute(f'EXPLAIN QUERY PLAN {q}', v))
+        call()
+        start = perf_counter()
+        for _ in range(REPEAT):
+            call()
+        ms = (perf_counter() - start) / REPEAT * 1000
+        print(f'  {name:22} {ms:8.3f} ms  {plan}')
+
+
+def main(scale: float) -> None:
+    base = temp_engine()
+    print(f'building database, scale {scale}...')
+    build_database(base, BASE_VERSION, scale)
+    for title, version in (('before', BASE_VERSION), ('after', 0)):
+        engine = temp_engine()
+        shutil.copy(base, engine)
+        print(f'{title}:')
+        run(db_class(version)(engine))
+
+
+if __name__ == '__main__':
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 1.0)
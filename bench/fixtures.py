@@ -0,0 +1,62 @@
+import random
+import shutil
+import tempfile
+from os import listdir, path
+
+from classes.database import DB
+
+
+def db_class(version: int = 0) -> type[DB]:
+    """
+    Return DB subclass migrated up to version.
+    0 is the last version.
+    """
+    if version == 0:
+        return DB
+    dir_path = tempfile.mkdtemp(prefix='bench_migrations_')
+    for fn in listdir(DB._migrations_dir):
+        if int(fn.partition('_')[0]) <= version:
+            shutil.copy(path.join(DB._migrations_dir, fn), dir_path)
+    return type('BenchDB', (DB,), {'_migrations_dir': dir_path})
+
+
+def temp_engine() -> str:
+    """Return path of new database file in temporary directory."""
+    return path.join(tempfile.mkdtemp(prefix='bench_'), 'bench.db')
+
+
+def build_database(engine: str, version: int = 0, scale: float = 1.0) -> DB:
+    """
+    Return database migrated up to version and filled by scale of
+    200k sessions of 20k chats, 1M results, 100k hotels, 300k photos
+    and 50k locations. WAL is checkpointed, so database file can be
+    copied.
+    """
+    db = db_class(version)(engine)
+    r = random.Random(1)
+    sessions = int(200000 * scale)
+    results = int(1000000 * scale)
+    hotels = int(100000 * scale)
+    photos = int(300000 * scale)
+    locations = int(50000 * scale)
+    chats = max(sessions // 10, 1)
+    db._update_batch([
+        ("INSERT INTO locations VALUES (?, ?, ?, ?, ?)", [
+            [i, i, f'City{i}, Country', f'City{i}', f'city{i}']
+            for i in range(locations)]),
+        ("INSERT INTO sessions(chat_id, command, complete) VALUES (?, ?, ?)", [
+            [i % chats, '/lowprice', i < sessions - 10]
+            for i in range(sessions)]),
+        ("INSERT INTO hotels VALUES (?, ?, ?, ?, ?)", [
+            [i, 'Hotel', 'Street, 1', 3, 1.0] for i in range(hotels)]),
+        ("INSERT INTO results(session_id, hotel_id, url, price)"
+         " VALUES (?, ?, ?, ?)", [
+            [i // 5, r.randrange(hotels), 'url', 1.0]
+            for i in range(results)]),
+        ("INSERT INTO photos VALUES (?, ?, ?)", [
+            [i, r.randrange(hotels), 'url'] for i in range(photos)]),
+        # index is not kept in sync by triggers before version 6
+        ("INSERT INTO locations_fts(locations_fts) VALUES('rebuild')", [[]]),
+    ])
+    db._conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    return db
@@ -0,0 +1,88 @@
+"""
+/history database load time and queries by history depth:
+one query of DB.get_history against loading every session's location,
+results and hotels by own queries.
+
+python -m bench.history [scale]
+"""
+import sys
+from datetime import date, datetime, timedelta
+from time import perf_counter
+
+from bench.fixtures import build_database, temp_engine
+from classes.database import DB
+
+
+CHAT_ID = 10 ** 7
+DEPTHS = (1, 5, 10, 20)
+RESULTS = 5
+REPEAT = 50
+
+
+def add_history(db: DB, chat_id: int, depth: int) -> None:
+    """Add depth complete sessions of RESULTS results to chat."""
+    first_id = db._select_one('SELECT MAX(id) + 1 AS id FROM sessions', [], {})
+    first_id = first_id['id'] or 1
+    check_in = date.today() + timedelta(days=3)
+    sessions = []
+    results = []
+    for i in range(depth):
+        id = first_id + i
+        sessions.append([
+            id, chat_id, datetime(2026, 1, 1) + timedelta(minutes=i),
+            '/lowprice', i + 1, check_in, check_in + timedelta(days=1),
+            0.0, 0.0, 0.0, 0.0, RESULTS, True, 3, True])
+        results += [
+            [id, i * RESULTS + k, 'url', 1000.0 + k] for k in range(RESULTS)]
+    db._update_batch([
+        ("INSERT INTO sessions(id, chat_id, query_time, command,"
+         " location_id, check_in, check_out, price_min, price_max,"
+         " distance_min, distance_max, results_num, photos_show,"
+         " photos_num, complete)"
+         " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", sessions),
+        ("INSERT INTO results(session_id, hotel_id, url, price)"
+         " VALUES (?, ?, ?, ?)", results),
+    ])
+
+
+def load_by_session(db: DB, chat_id: int, limit: int) -> list:
+    """Return history loaded by queries of every session and result."""
+    history = []
+    for session in db.get_sessions(chat_id, limit):
+        location = db.get_location_byid(session.location_id)
+        results = [
+            (db.get_hotel_byid(x.hotel_id), x)
+            for x in db.get_search_results(session)]
+        history.append((session, location, results))
+    return history
+
+
+def bench(db: DB, load: callable, depth: int) -> tuple[float, int]:
+    """Return average time in milliseconds and queries of load."""
+    history = load(db, CHAT_ID, depth)
+    assert len(history) == depth
+    assert all(len(x[2]) == RESULTS for x in history)
+    queries = db.queries
+    start = perf_counter()
+    for _ in range(REPEAT):
+        load(db, CHAT_ID, depth)
+    ms = (perf_counter() - start) / REPEAT * 1000
+    return ms, (db.queries - queries) // REPEAT
+
+
+def main(scale: float) -> None:
+    print(f'building database, scale {scale}...')
+    db = build_database(temp_engine(), scale=scale)
+    add_history(db, CHAT_ID, max(DEPTHS))
+    print(f'  {"depth":>5} {"by session":>20} {"get_history":>20}')
+    for depth in DEPTHS:
+        by_session = bench(db, load_by_session, depth)
+        joined = bench(db, DB.get_history, depth)
+        print(
+            f'  {depth:5}'
+            f' {by_session[0]:8.2f} ms {by_session[1]:5} q'
+            f' {joined[0]:8.2f} ms {joined[1]:5} q')
+
+
+if __name__ == '__main__':
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 1.0)
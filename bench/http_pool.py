@@ -0,0 +1,82 @@
+"""
+RapidApi request latency by new connection per call and by pooled
+keep-alive Session of Api against a local stub server.
+
+python -m bench.http_pool [calls] [cert.pem key.pem]
+
+Stub server uses TLS if certificate and key files are set
+(handshakes are the most of saved time of real RapidApi host).
+"""
+import json
+import ssl
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+from time import perf_counter
+
+import requests
+
+from classes.rapidapi import Api
+
+
+# Api calls of one search: first pages and hotel photos
+SEARCH_CALLS = 8
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """Keep-alive handler answering every GET by small JSON."""
+    protocol_version = 'HTTP/1.1'
+    # one write of response, unbuffered writes wait for delayed ACK
+    wbufsize = -1
+    body = json.dumps({'data': {'body': {'searchResults': {
+        'totalCount': 0, 'results': []}}}}).encode()
+
+    def do_GET(self) -> None:
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def serve(cert: str = None, key: str = None) -> str:
+    """Start stub server in background. Return its base url."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _StubHandler)
+    scheme = 'http'
+    if cert is not None:
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(cert, key)
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+        scheme = 'https'
+    Thread(target=server.serve_forever, daemon=True).start()
+    return f'{scheme}://127.0.0.1:{server.server_port}'
+
+
+def bench(name: str, request: callable, url: str, calls: int) -> float:
+    """Print and return average time of request in milliseconds."""
+    request('GET', url, verify=False).raise_for_status()
+    start = perf_counter()
+    for _ in range(calls):
+        request('GET', url, verify=False).raise_for_status()
+    ms = (perf_counter() - start) / calls * 1000
+    print(f'  {name:24} {ms:8.2f} ms per call')
+    return ms
+
+
+def main(calls: int, cert: str = None, key: str = None) -> None:
+    url = f'{serve(cert, key)}/properties/list'
+    requests.packages.urllib3.disable_warnings()
+    print(f'{calls} sequential calls to {url}:')
+    new = bench('new connection', requests.request, url, calls)
+    pooled = bench(
+        'pooled Api session', Api._get_session().request, url, calls)
+    print(
+        f'  saved per search ({SEARCH_CALLS} calls)'
+        f' {(new - pooled) * SEARCH_CALLS:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200, *sys.argv[2:4])
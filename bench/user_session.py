@@ -0,0 +1,80 @@
+"""
+UserSession state machine timings per call and memory per session.
+
+python -m bench.user_session
+"""
+import tracemalloc
+from copy import copy
+from datetime import date, datetime, timedelta
+from time import perf_counter
+
+from classes.user_session import UserSession
+
+
+CHECK_IN = date.today() + timedelta(days=3)
+CHECK_OUT = CHECK_IN + timedelta(days=1)
+# session loaded from database row
+ROW = {
+    'command': '/bestdeal', 'id': 1, 'query_time': datetime(2026, 1, 1),
+    'location_id': 1, 'check_in': CHECK_IN, 'check_out': CHECK_OUT,
+    'price_min': 1.0, 'price_max': 2.0, 'distance_min': 0.0,
+    'distance_max': 5.0, 'results_num': 3, 'photos_show': True,
+    'photos_num': 2
+}
+# user messages of dialog by command
+DIALOGS = {
+    '/bestdeal': [
+        1, str(CHECK_IN), str(CHECK_OUT), '100', '2000', '0', '20', '3',
+        True, '2'],
+    '/lowprice': [1, str(CHECK_IN), str(CHECK_OUT), '3', True, '2'],
+}
+
+
+def update(session: UserSession, value: object) -> UserSession:
+    """
+    Return session updated as by one message: cache copy,
+    step lookups of handlers, set_attrs and next step start.
+    """
+    session = copy(session)
+    session.current_step
+    step = session.current_step
+    session.set_attrs({step: value})
+    session.pop_changes()
+    session.current_step
+    return session
+
+
+def bench(name: str, call: callable, number: int, calls: int = 1) -> None:
+    """Print average time of call in microseconds."""
+    call()
+    start = perf_counter()
+    for _ in range(number):
+        call()
+    us = (perf_counter() - start) / number / calls * 1e6
+    print(f'  {name:28} {us:8.2f} us')
+
+
+def main() -> None:
+    full = UserSession(1, **ROW)
+    half = UserSession(1, **dict(list(ROW.items())[:5]))
+    bench('current_step (complete)', lambda: full.current_step, 200000)
+    bench('current_step (check_out)', lambda: half.current_step, 200000)
+    bench('load from db row', lambda: UserSession(1, **ROW), 20000)
+    bench('copy', lambda: copy(full), 100000)
+    for command, values in DIALOGS.items():
+        def dialog() -> None:
+            session = UserSession(
+                1, command=command, id=1, query_time=datetime(2026, 1, 1))
+            for value in values:
+                session = update(session, value)
+            assert session.current_step == 'complete', session.current_step
+
+        bench(f'update, {command} dialog', dialog, 5000, len(values))
+    tracemalloc.start()
+    sessions = [UserSession(1, **ROW) for _ in range(10000)]
+    size = tracemalloc.get_traced_memory()[0] / len(sessions)
+    print(f'  {"memory per session":28} {size:8.0f} B')
+
+
+if __name__ == '__main__':
+    main()
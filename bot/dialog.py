@@ -91,3 +91,10 @@ USER_SESSION = """⏲ *{}*
 USER_SESSION_FLOATS = """💰 {:.0f} - {:.0f} {}
 📏 {:.1f} - {:.1f} {}
 """
+
+# History
+HISTORY_MORE = '📜 Показано запросов: *{:d}*'
+HISTORY_MORE_BTN = 'Показать еще'
+HISTORY_PHOTOS = '🖼 Фотографии отеля *{}*'
+HISTORY_PHOTOS_WRONG = '🖼 Фотографии отеля *{}* не найдены.'
+HISTORY_PHOTOS_BTN = 'Показать фотографии'
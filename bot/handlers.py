@@ -54,9 +54,9 @@ def main_commands(message: Message) -> None:
     """Process main commands."""
     bot.send_chat_action(message.chat.id, 'typing')
     replies = s.command_replies(message.chat.id, message.text)
-    bot.send_reply_messages(replies)
-    if len(replies) > 0:
-        if replies[-1].next_handler:
+    last_reply = bot.send_reply_messages(replies)
+    if last_reply is not None:
+        if last_reply.next_handler:
             bot.register_next_step_handler_by_chat_id(
                 message.chat.id, bot_next_handler)
 
@@ -75,21 +75,31 @@ def history_command(message: Message) -> None:
 def calendar_check_in(callback: CallbackQuery) -> None:
     """"""
     replies = s.callback_replies(callback.message.chat.id, callback)
-    bot.send_reply_messages(replies)
-    if len(replies) > 0:
-        if replies[-1].next_handler:
+    last_reply = bot.send_reply_messages(replies)
+    if last_reply is not None:
+        if last_reply.next_handler:
             bot.register_next_step_handler_by_chat_id(
                 callback.message.chat.id, bot_next_handler)
 
 
+@bot.callback_query_handler(
+    func=lambda x: x.data.split(':')[0] in s.HISTORY_CALLBACKS)
+def history_callback(callback: CallbackQuery) -> None:
+    """Process history pages and hotel photos callbacks."""
+    bot.answer_callback_query(callback.id)
+    bot.send_chat_action(callback.message.chat.id, 'typing')
+    replies = s.history_callback_replies(callback.message.chat.id, callback)
+    bot.send_reply_messages(replies)
+
+
 # Next handlers and text messages handlers
 @bot.message_handler(content_types=['text'])
 def bot_next_handler(message: Message) -> None:
     """Next handler for all proceccing commands."""
     bot.send_chat_action(message.chat.id, 'typing')
     replies = s.message_replies(message.chat.id, message.text)
-    bot.send_reply_messages(replies)
-    if len(replies) > 0:
-        if replies[-1].next_handler:
+    last_reply = bot.send_reply_messages(replies)
+    if last_reply is not None:
+        if last_reply.next_handler:
             bot.register_next_step_handler_by_chat_id(
                 message.chat.id, bot_next_handler)
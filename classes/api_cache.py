@@ -0,0 +1,138 @@
+from collections import OrderedDict
+from json import dumps, loads
+from threading import Lock
+from time import time
+
+from app.app_logger import get_logger
+from classes.db_connector import DBConnector
+from classes.metrics import Metrics
+
+
+# initiate logger
+logger = get_logger(__name__)
+
+
+class ApiCacheStorage(DBConnector):
+    """SQLite storage for ApiCache responses surviving restarts."""
+    def _migrate(self) -> None:
+        """Create cache table."""
+        q = (
+            'CREATE TABLE IF NOT EXISTS "api_cache"('
+            '"key" TEXT NOT NULL, '
+            '"expires" REAL NOT NULL, '
+            '"data" TEXT NOT NULL, '
+            'PRIMARY KEY("key"))'
+        )
+        self._update(q)
+        logger.debug(f'Api cache storage created [{self._engine}].')
+
+    def get(self, key: str) -> tuple[float, dict]:
+        """Return expires time and response data by key."""
+        q = 'SELECT expires, data FROM api_cache WHERE key = ?'
+        try:
+            response = self._select_one(q, [key], {})
+        except (self.DBError, self.DBSyntaxError):
+            response = None
+        if response is None:
+            return None
+        return response['expires'], loads(response['data'])
+
+    def set(self, key: str, expires: float, data: dict) -> bool:
+        """Return status of saving response data by key."""
+        q = (
+            'INSERT OR REPLACE INTO api_cache(key, expires, data)'
+            ' VALUES (?, ?, ?)'
+        )
+        try:
+            self._update(q, [key, expires, dumps(data)])
+            return True
+        except (self.DBError, self.DBSyntaxError):
+            return False
+
+    def delete_expired(self) -> None:
+        """Delete expired responses."""
+        q = 'DELETE FROM api_cache WHERE expires < ?'
+        try:
+            self._update(q, [time()])
+        except (self.DBError, self.DBSyntaxError):
+            pass
+
+
+class ApiCache:
+    """
+    Size-bounded LRU cache of Api responses with TTL by endpoint.
+    ApiCacheStorage instance is used as second tier if set.
+    """
+    def __init__(
+            self, max_size: int, ttls: dict[str, int],
+            storage: ApiCacheStorage = None) -> None:
+        """Initiate cache by max_size, ttls by endpoint and storage."""
+        self._max_size = max_size
+        self._ttls = ttls
+        self._storage = storage
+        self._items: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._lock = Lock()
+        self._storage_lock = Lock()
+        self.metrics = Metrics(__name__)
+        if self._storage is not None:
+            with self._storage_lock:
+                self._storage.delete_expired()
+
+    @staticmethod
+    def key(endpoint: str, params: dict) -> str:
+        """Return cache key by endpoint and normalized params."""
+        normalized = sorted(
+            (str(k), str(v).strip()) for k, v in params.items())
+        return f'{endpoint}?{dumps(normalized, ensure_ascii=False)}'
+
+    def ttl(self, endpoint: str) -> int:
+        """Return endpoint TTL in seconds. 0 if endpoint is not cached."""
+        return self._ttls.get(endpoint, 0)
+
+    def get(self, endpoint: str, params: dict) -> dict:
+        """Return cached response data. None if not cached or expired."""
+        if self.ttl(endpoint) <= 0:
+            return None
+        key = self.key(endpoint, params)
+        now = time()
+        with self._lock:
+            item = self._items.get(key, None)
+            if item is not None:
+                expires, data = item
+                if expires > now:
+                    self._items.move_to_end(key)
+                    self.metrics.incr('hits')
+                    return data
+                del self._items[key]
+                self.metrics.incr('expired')
+        if self._storage is not None:
+            with self._storage_lock:
+                item = self._storage.get(key)
+            if item is not None and item[0] > now:
+                self._put(key, *item)
+                self.metrics.incr('storage hits')
+                return item[1]
+        self.metrics.incr('misses')
+        return None
+
+    def set(self, endpoint: str, params: dict, data: dict) -> None:
+        """Save response data by endpoint and params."""
+        ttl = self.ttl(endpoint)
+        if ttl <= 0:
+            return None
+        key = self.key(endpoint, params)
+        expires = time() + ttl
+        self._put(key, expires, data)
+        if self._storage is not None:
+            with self._storage_lock:
+                self._storage.set(key, expires, data)
+
+    def _put(self, key: str, expires: float, data: dict) -> None:
+        """Put item to memory tier and evict least recently used items."""
+        with self._lock:
+            self._items[key] = (expires, data)
+            self._items.move_to_end(key)
+            while len(self._items) > self._max_size:
+                self._items.popitem(last=False)
+                self.metrics.incr('evictions')
+            self.metrics.gauge('size', len(self._items))
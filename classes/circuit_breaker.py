@@ -0,0 +1,92 @@
+from threading import Lock
+from time import monotonic
+
+from app.app_logger import get_logger
+from classes.metrics import Metrics
+
+
+# initiate logger
+logger = get_logger(__name__)
+
+
+class CircuitBreaker:
+    """
+    Thread-safe circuit breaker.
+    Opens after threshold consecutive failures and fails fast
+    for reset_timeout seconds. Then one probe call is allowed
+    (half-open state) to close it again.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, threshold: int, reset_timeout: float) -> None:
+        """Initiate closed circuit breaker."""
+        self._threshold = threshold
+        self._reset_timeout = reset_timeout
+        self._lock = Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened = 0.0
+        self._probe = 0.0
+        self.metrics = Metrics(__name__)
+        self.metrics.gauge('state', self._state)
+
+    @property
+    def state(self) -> str:
+        """Return circuit breaker state."""
+        return self._state
+
+    def _set_state(self, state: str) -> None:
+        """Change state with logging."""
+        if state != self._state:
+            logger.warning(f'Circuit breaker {self._state} -> {state}.')
+            self._state = state
+            self.metrics.gauge('state', state)
+
+    def allow(self) -> bool:
+        """Return permission to make a call."""
+        if self._threshold <= 0:
+            return True
+        with self._lock:
+            now = monotonic()
+            if self._state == self.OPEN:
+                if now - self._opened < self._reset_timeout:
+                    self.metrics.incr('rejected')
+                    return False
+                self._set_state(self.HALF_OPEN)
+                self._probe = 0.0
+            if self._state == self.HALF_OPEN:
+                # one probe call at a time, stale probe is replaced
+                if now - self._probe < self._reset_timeout:
+                    self.metrics.incr('rejected')
+                    return False
+                self._probe = now
+            return True
+
+    def release(self) -> None:
+        """
+        Register call without result for service state (e.g. stopped
+        by client limits or 429). Half-open probe is allowed again.
+        """
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._probe = 0.0
+
+    def success(self) -> None:
+        """Register successful call."""
+        with self._lock:
+            self._failures = 0
+            self._set_state(self.CLOSED)
+
+    def failure(self) -> None:
+        """Register failed call."""
+        with self._lock:
+            self._failures += 1
+            self.metrics.incr('failures')
+            if self._state == self.HALF_OPEN or \
+                    0 < self._threshold <= self._failures:
+                if self._state != self.OPEN:
+                    self.metrics.incr('opened')
+                self._set_state(self.OPEN)
+                self._opened = monotonic()
@@ -1,6 +1,9 @@
+from time import time
+
 from app.app_logger import get_logger
 from classes.db_connector import DBConnector
 from classes.basic import Location, Hotel, HotelPhoto, SearchResult
+from classes.session_cache import SessionCache
 from classes.user_session import UserSession
 
 
@@ -10,6 +13,18 @@ logger = get_logger(__name__)
 
 class DB(DBConnector):
     """Extendend class for application database methods."""
+    # minimal length of full-text trigram query
+    FTS_MIN_LENGTH = 3
+
+    def __init__(
+            self, engine: str, session_cache: SessionCache = None) -> None:
+        """
+        Create database instance by engine.
+        Active sessions are kept in session_cache if set.
+        """
+        super().__init__(engine)
+        self._session_cache = session_cache
+
     # Location
     def get_location_byid(self, id: int) -> Location:
         """Return Location instance by id."""
@@ -29,48 +44,95 @@ class DB(DBConnector):
             return None
         return Location(**response)
 
-    def get_locations_byname(
-            self, name: str, limit: int = 0) -> list[Location]:
-        """
-        Return list of Lication instances by name.
-        Can be limited.
-        """
-        # query by name_lower
+    def get_locations(self) -> list[Location]:
+        """Return list of all Location instances."""
         columns = (
             'destination_id', 'geo_id', 'caption', 'name', 'name_lower'
         )
         q = (
             f"SELECT {', '.join(columns)} FROM locations"
-            " WHERE name_lower = ? ORDER BY destination_id"
+            " ORDER BY destination_id"
         )
-        if limit > 0:
-            q += f" LIMIT {limit}"
-        name_lower = name.lower().replace(' ', '').replace('-', '')
         try:
-            response = self._select_all(q, [name_lower], {})
+            response = self._select_all(q, [], {})
         except self.DBError:
             response = []
-        if len(response) > 0:
-            return [Location(**x) for x in response]
-        # query by caption
-        q = (
-            f"SELECT {', '.join(columns)} FROM locations"
-            " WHERE caption LIKE ? ORDER BY destination_id"
+        return [Location(**x) for x in response]
+
+    def _fts_match(self, column: str, text: str) -> str:
+        """
+        Return full-text query of text phrase in column.
+        Return None if text is shorter than FTS_MIN_LENGTH.
+        """
+        if len(text) < self.FTS_MIN_LENGTH:
+            return None
+        return '{} : "{}"'.format(column, text.replace('"', '""'))
+
+    def _select_locations(
+            self, fts_match: str, where: str, v: list,
+            limit: int = 0) -> list[Location]:
+        """
+        Return list of Location instances by where condition and v values
+        with locations pre-filtered by full-text fts_match query.
+        Filter without full-text index if fts_match is None
+        or index is not available.
+        """
+        columns = (
+            'destination_id', 'geo_id', 'caption', 'name', 'name_lower'
         )
+        q = f"SELECT {', '.join(columns)} FROM locations WHERE {where}"
+        order = " ORDER BY destination_id"
         if limit > 0:
-            q += f" LIMIT {limit}"
-        caption = f'%{name}%'
+            order += f" LIMIT {limit}"
+        if fts_match is not None:
+            fts_q = (
+                f"SELECT {', '.join(columns)} FROM locations"
+                " WHERE destination_id IN (SELECT rowid FROM locations_fts"
+                f" WHERE locations_fts MATCH ?) AND {where}"
+            )
+            try:
+                response = self._select_all(
+                    fts_q + order, [fts_match] + v, {})
+                return [Location(**x) for x in response]
+            except self.DBSyntaxError:
+                logger.debug('_select_locations full-text index error.')
+            except self.DBError:
+                return []
         try:
-            response = self._select_all(q, [caption], {})
+            response = self._select_all(q + order, v, {})
         except self.DBError:
             response = []
-        if len(response) > 0:
-            return [Location(**x) for x in response]
+        return [Location(**x) for x in response]
+
+    def get_locations_byname(
+            self, name: str, limit: int = 0) -> list[Location]:
+        """
+        Return list of Lication instances by name.
+        Can be limited.
+        Full-text trigram index is used for names of FTS_MIN_LENGTH
+        symbols and more.
+        """
+        # query by name_lower
+        name_lower = name.lower().replace(' ', '').replace('-', '')
+        locations = self._select_locations(
+            self._fts_match('name_lower', name_lower),
+            'name_lower = ?', [name_lower], limit)
+        if len(locations) > 0:
+            return locations
+        # query by caption
+        locations = self._select_locations(
+            self._fts_match('caption', name),
+            'caption LIKE ?', [f'%{name}%'], limit)
+        if len(locations) > 0:
+            return locations
         logger.debug('get_location_byname return None.')
         return []
 
     def add_location(self, location: Location) -> bool:
-        """Return status of adding Location instance."""
+        """
+        Return status of adding Location instance.
+        Full-text index is updated by database triggers.
+        """
         columns = (
             'destination_id', 'geo_id', 'caption', 'name', 'name_lower'
         )
@@ -78,13 +140,14 @@ class DB(DBConnector):
             f"INSERT INTO locations({','.join(columns)})"
             f" VALUES ({', '.join('?' * len(columns))})"
         )
+        data = location.data
         try:
-            self._update(q, location.data)
-            return True
+            self._update(q, data)
         except self.DBUniqueError:
             return True
         except self.DBError:
             return False
+        return True
 
     # Hotel
     def get_hotel_byid(self, id: int) -> Hotel:
@@ -102,6 +165,7 @@ class DB(DBConnector):
             response = None
         if response is None:
             logger.debug('get_hotel_byid return None.')
+            return None
         return Hotel(**response)
 
     def add_hotel(self, hotel: Hotel) -> bool:
@@ -201,7 +265,14 @@ class DB(DBConnector):
 
     # UserSession
     def get_active_session(self, chat_id: int) -> UserSession:
-        """Return active UserSession instance by chat_id."""
+        """
+        Return active UserSession instance by chat_id.
+        Session cache is checked first.
+        """
+        if self._session_cache is not None:
+            session = self._session_cache.get(chat_id)
+            if session is not None:
+                return session
         columns = (
             'command', 'id', 'query_time',
             'location_id',
@@ -222,7 +293,10 @@ class DB(DBConnector):
         if response is None:
             logger.debug('get_active_session return None.')
             return None
-        return UserSession(chat_id, **response)
+        session = UserSession(chat_id, **response)
+        if self._session_cache is not None:
+            self._session_cache.set(session)
+        return session
 
     def get_sessions(self, chat_id: int, limit: int = 0) -> list[UserSession]:
         """Return list of complete UserSession instances list by chat_id."""
@@ -251,6 +325,77 @@ class DB(DBConnector):
         logger.debug('get_sessions return None.')
         return []
 
+    def get_history(
+        self, chat_id: int, limit: int = 0, offset: int = 0
+    ) -> list[tuple[UserSession, Location, list[tuple[Hotel, SearchResult]]]]:
+        """
+        Return list of complete UserSession instances by chat_id
+        with their Location instances and lists of Hotel and SearchResult
+        instances in one query. Sessions are ordered from the last one.
+        Location is None if it is not found.
+        Can be limited and skip offset last sessions.
+        """
+        session_columns = (
+            'command', 'id', 'query_time',
+            'location_id',
+            'check_in', 'check_out',
+            'price_min', 'price_max',
+            'distance_min', 'distance_max',
+            'results_num',
+            'photos_show', 'photos_num'
+        )
+        location_columns = (
+            'destination_id', 'geo_id', 'caption', 'name', 'name_lower'
+        )
+        hotel_columns = (
+            'id', 'name', 'address', 'star_rating', 'distance'
+        )
+        result_columns = ('session_id', 'hotel_id', 'url', 'price')
+        columns = (
+            [f's.{x}' for x in session_columns]
+            + [f'l.{x} AS l_{x}' for x in location_columns]
+            + [f'h.{x} AS h_{x}' for x in hotel_columns]
+            + [f'r.{x} AS r_{x}' for x in result_columns]
+        )
+        sessions_q = (
+            f"SELECT {', '.join(session_columns)} FROM sessions"
+            " WHERE chat_id = ? AND complete IS TRUE"
+            " ORDER BY query_time DESC, id DESC"
+        )
+        if limit > 0:
+            sessions_q += f" LIMIT {limit}"
+            if offset > 0:
+                sessions_q += f" OFFSET {offset}"
+        q = (
+            f"SELECT {', '.join(columns)} FROM ({sessions_q}) AS s"
+            " LEFT JOIN locations AS l ON l.destination_id = s.location_id"
+            " LEFT JOIN results AS r ON r.session_id = s.id"
+            " LEFT JOIN hotels AS h ON h.id = r.hotel_id"
+            " ORDER BY s.query_time DESC, s.id DESC, r.id"
+        )
+        try:
+            response = self._select_all(q, [chat_id], {})
+        except self.DBError:
+            response = []
+        history = []
+        for row in response:
+            if len(history) == 0 or history[-1][0].id != row['id']:
+                session = UserSession(
+                    chat_id, **{x: row[x] for x in session_columns})
+                location = None
+                if row['l_destination_id'] is not None:
+                    location = Location(
+                        **{x: row[f'l_{x}'] for x in location_columns})
+                history.append((session, location, []))
+            if row['h_id'] is not None:
+                history[-1][2].append((
+                    Hotel(**{x: row[f'h_{x}'] for x in hotel_columns}),
+                    SearchResult(
+                        **{x: row[f'r_{x}'] for x in result_columns})))
+        if len(history) == 0:
+            logger.debug('get_history return None.')
+        return history
+
     def add_session(self, session: UserSession) -> UserSession:
         """Return added UserSession instance."""
         columns = ('chat_id', 'command')
@@ -270,10 +415,14 @@ class DB(DBConnector):
         return self.get_active_session(session.chat_id)
 
     def update_session(
-            self, session: UserSession, attrs: dict) -> UserSession:
+            self, session: UserSession, attrs: dict,
+            reload: bool = True) -> UserSession:
         """
         Update UserSession attribute values by attrs.
-        Return updated UserSession instance.
+        Return updated UserSession instance. Return session itself
+        without loading it again if reload is False.
+        Cached session is replaced by session or removed on completion
+        and errors.
         """
         try:
             id = session.id
@@ -294,5 +443,144 @@ class DB(DBConnector):
         try:
             self._update(q, values)
         except self.DBError:
+            self.forget_session(chat_id)
             return None
+        if self._session_cache is not None:
+            if attrs.get('complete', False):
+                self._session_cache.delete(chat_id)
+            else:
+                self._session_cache.set(session)
+        if not reload:
+            return session
         return self.get_active_session(chat_id)
+
+    def forget_session(self, chat_id: int) -> None:
+        """Remove cached active UserSession by chat_id."""
+        if self._session_cache is not None:
+            self._session_cache.delete(chat_id)
+
+    def unit_of_work(self) -> 'UnitOfWork':
+        """Return UnitOfWork instance to save writes in one transaction."""
+        return UnitOfWork(self)
+
+    # Api usage
+    def get_api_usage(self, period: str) -> dict[str, int]:
+        """Return Api calls number by endpoint in period."""
+        q = "SELECT endpoint, calls FROM api_usage WHERE period = ?"
+        try:
+            response = self._select_all(q, [period])
+        except (self.DBError, self.DBSyntaxError):
+            response = []
+        return {endpoint: calls for endpoint, calls in response}
+
+    def add_api_usage(
+            self, period: str, endpoint: str, calls: int = 1) -> bool:
+        """Return status of adding Api calls number to endpoint in period."""
+        q = (
+            "INSERT INTO api_usage(period, endpoint, calls) VALUES (?, ?, ?)"
+            " ON CONFLICT(period, endpoint)"
+            " DO UPDATE SET calls = calls + excluded.calls"
+        )
+        try:
+            self._update(q, [period, endpoint, calls])
+            return True
+        except (self.DBError, self.DBSyntaxError):
+            return False
+
+    # Negative results
+    def get_negative_result(self, kind: str, key: str) -> bool:
+        """Return True if lookup of kind by key had no results recently."""
+        q = (
+            "SELECT expires FROM negative_results"
+            " WHERE kind = ? AND key = ? AND expires > ?"
+        )
+        try:
+            response = self._select_one(q, [kind, key, time()])
+        except (self.DBError, self.DBSyntaxError):
+            response = None
+        return response is not None
+
+    def add_negative_result(self, kind: str, key: str, ttl: int) -> bool:
+        """
+        Return status of saving empty lookup result of kind by key
+        for ttl seconds. Expired results are deleted.
+        """
+        now = time()
+        try:
+            self._update_batch([
+                ("DELETE FROM negative_results WHERE expires <= ?", [[now]]),
+                ("INSERT OR REPLACE INTO negative_results(kind, key, expires)"
+                 " VALUES (?, ?, ?)", [[kind, key, now + ttl]])])
+            return True
+        except (self.DBError, self.DBSyntaxError):
+            return False
+
+
+class UnitOfWork:
+    """
+    Search results writes collected and saved by DB instance
+    in one transaction on commit.
+    Rows of every query are saved by one executemany call.
+    """
+    def __init__(self, db: DB) -> None:
+        """Initiate empty unit of work of db."""
+        self._db = db
+        # rows by query in first use order
+        self._writes: dict[str, list[list]] = {}
+
+    def _add(self, q: str, rows: list[list]) -> None:
+        """Add rows to query."""
+        if len(rows) > 0:
+            self._writes.setdefault(q, []).extend(rows)
+
+    def add_hotels(self, hotels: list[Hotel]) -> None:
+        """Add Hotel instances list. Existing hotels are ignored."""
+        columns = (
+            'id', 'name', 'address', 'star_rating', 'distance'
+        )
+        q = (
+            f"INSERT OR IGNORE INTO hotels({', '.join(columns)})"
+            f" VALUES ({', '.join('?' * len(columns))})"
+        )
+        self._add(q, [x.data for x in hotels])
+
+    def add_search_results(self, search_results: list[SearchResult]) -> None:
+        """Add SearchResult instances list."""
+        columns = ('session_id', 'hotel_id', 'url', 'price')
+        q = (
+            f"INSERT INTO results({', '.join(columns)})"
+            f" VALUES ({', '.join('?' * len(columns))})"
+        )
+        self._add(q, [x.data for x in search_results])
+
+    def add_hotels_photos(self, photos: dict[Hotel, list[HotelPhoto]]) -> None:
+        """
+        Add HotelPhoto instances lists by Hotel.
+        Existing photos are ignored.
+        """
+        columns = ('id', 'url', 'hotel_id')
+        q = (
+            f"INSERT OR IGNORE INTO photos({', '.join(columns)})"
+            f" VALUES ({', '.join('?' * len(columns))})"
+        )
+        self._add(q, [
+            photo.data + [hotel.id]
+            for hotel, hotel_photos in photos.items()
+            for photo in hotel_photos])
+
+    def extend(self, uow: 'UnitOfWork') -> None:
+        """Add writes of other unit of work."""
+        for q, rows in uow._writes.items():
+            self._add(q, rows)
+
+    def commit(self) -> bool:
+        """Return status of saving all writes in one transaction."""
+        if len(self._writes) == 0:
+            return True
+        writes = list(self._writes.items())
+        self._writes = {}
+        try:
+            self._db._update_batch(writes)
+            return True
+        except self._db._DBError:
+            return False
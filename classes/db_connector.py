@@ -1,5 +1,6 @@
 import sqlite3
-from os import path, getcwd
+from os import listdir, path, getcwd
+from threading import RLock, local
 
 from app.app_logger import get_logger
 
@@ -9,51 +10,128 @@ logger = get_logger(__name__)
 
 
 class DBConnector:
-    """Basic class with SQLite database methods."""
-    _conn: sqlite3.Connection
+    """
+    Basic class with SQLite database methods.
+    Database structure is created and updated by migrations:
+    <version>_<name>.sql files of _migrations_dir applied in version order.
+    Every thread uses own connection in WAL journal mode, so reads
+    run in parallel. Writes are serialized by one writer lock.
+    """
+    _migrations_dir = path.join('data', 'migrations')
+    # pragmas of every connection
+    _pragmas = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -16000,
+        'mmap_size': 64 * 1024 * 1024,
+        'busy_timeout': 5000
+    }
 
     def __init__(self, engine: str) -> None:
         """Create database instance by engine."""
         self._engine = engine
-        self._connect()
-
-    def _connect(self) -> None:
-        """Add database connection to instance."""
-        create = False
-        db_path = path.join(getcwd(), self._engine)
-        if not path.exists(db_path):
-            create = True
+        self._db_path = path.join(getcwd(), self._engine)
+        self._local = local()
+        # single writer of bot and executor threads
+        self._write_lock = RLock()
+        self._migrate()
+
+    @property
+    def queries(self) -> int:
+        """Return number of SQL queries run by current thread."""
+        return getattr(self._local, 'queries', 0)
+
+    def _count_query(self) -> None:
+        """Count SQL query of current thread."""
+        self._local.queries = self.queries + 1
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        """Return database connection of current thread."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._connect()
+        return conn
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return new database connection of current thread."""
         try:
-            self._conn = sqlite3.connect(
-                db_path,
-                detect_types=sqlite3.PARSE_DECLTYPES,
-                check_same_thread=False
+            conn = sqlite3.connect(
+                self._db_path,
+                detect_types=sqlite3.PARSE_DECLTYPES
             )
+            for pragma, value in self._pragmas.items():
+                conn.execute(f'PRAGMA {pragma} = {value}')
             logger.debug(f'Database connection to [{self._engine}] created.')
         except sqlite3.Error as e:
             raise self.DBConnectionError(*e.args)
-        if create:
-            self._create()
-
-    def _create(self) -> None:
-        """Create database structure from schema.sql file."""
-        fn_dir = 'data'
-        fn = 'schema.sql'
-        fn_path = path.join(getcwd(), fn_dir, fn)
-        if not path.exists(fn_path):
+        self._local.conn = conn
+        return conn
+
+    def _get_migrations(self) -> list[tuple[int, str, str]]:
+        """Return (version, name, file path) list of migrations by version."""
+        dir_path = path.join(getcwd(), self._migrations_dir)
+        if not path.isdir(dir_path):
             raise self.DBConnectionError(
-                f'SQL schema file [{fn_path}] not exists.')
+                f'Migrations directory [{dir_path}] not exists.')
+        migrations = []
+        for fn in listdir(dir_path):
+            version, _, name = fn.removesuffix('.sql').partition('_')
+            if fn.endswith('.sql') and version.isdigit():
+                migrations.append(
+                    (int(version), name, path.join(dir_path, fn)))
+        return sorted(migrations)
+
+    def _get_version(self) -> int:
+        """Return schema version of database. 0 for database without it."""
         cursor = self._conn.cursor()
-        with open(fn_path, 'r') as f:
+        cursor.execute(
+            'CREATE TABLE IF NOT EXISTS "schema_version"('
+            '"version" INTEGER NOT NULL, '
+            '"name" VARCHAR(50) NOT NULL, '
+            '"applied" TIMESTAMP DEFAULT CURRENT_TIMESTAMP, '
+            'PRIMARY KEY("version"))')
+        self._conn.commit()
+        cursor.execute('SELECT MAX(version) FROM schema_version')
+        version = cursor.fetchone()[0]
+        cursor.close()
+        return version or 0
+
+    def _migrate(self) -> None:
+        """
+        Apply migrations newer than database schema version.
+        Every migration runs in own transaction with its version record,
+        so failed migration leaves database at previous version.
+        Migration applied by other process at the same time is skipped.
+        """
+        with self._write_lock:
             try:
-                cursor.executescript(f.read())
-                cursor.close()
-                self._conn.commit()
-                logger.debug(f'Database structure created from [{fn_path}].')
+                version = self._get_version()
             except sqlite3.Error as e:
-                cursor.close()
-                self._conn.rollback()
-                raise self._get_exception(e)
+                raise self.DBConnectionError(*e.args)
+            for migration, name, fn_path in self._get_migrations():
+                if migration <= version:
+                    continue
+                with open(fn_path, 'r') as f:
+                    script = f.read()
+                cursor = self._conn.cursor()
+                try:
+                    cursor.executescript(f'BEGIN IMMEDIATE;\n{script}')
+                    cursor.execute(
+                        'INSERT INTO schema_version(version, name)'
+                        ' VALUES (?, ?)', [migration, name])
+                    self._conn.commit()
+                    cursor.close()
+                    logger.debug(
+                        f'Database migrated to [{migration}_{name}].')
+                except sqlite3.Error as e:
+                    cursor.close()
+                    self._conn.rollback()
+                    if self._get_version() >= migration:
+                        continue
+                    raise self.DBConnectionError(
+                        f'Migration [{fn_path}] error.', *e.args)
+                version = migration
 
     # SQL methods
     def _select_one(
@@ -61,6 +139,7 @@ class DBConnector:
             v: list = [], rf: object = None) -> tuple | dict | int | str:
         """Return fetchone result of SQL query with rf row_factory."""
         logger.debug(f"_select_one query [{q}] [{', '.join(map(str, v))}]")
+        self._count_query()
         cursor = self._conn.cursor()
         if rf is not None:
             cursor.row_factory = self._row_factory(rf)
@@ -69,12 +148,15 @@ class DBConnector:
             return cursor.fetchone()
         except sqlite3.Error as e:
             raise self._get_exception(e)
+        finally:
+            cursor.close()
 
     def _select_all(
         self, q: str,
             v: list = [], rf: dict = None) -> list:
         """Return fetchall result of SQL query with rf row_factory."""
         logger.debug(f"_select_all query [{q}] [{', '.join(map(str, v))}]")
+        self._count_query()
         cursor = self._conn.cursor()
         if rf is not None:
             cursor.row_factory = self._row_factory(rf)
@@ -83,17 +165,44 @@ class DBConnector:
             return cursor.fetchall()
         except sqlite3.Error as e:
             raise self._get_exception(e)
+        finally:
+            cursor.close()
 
     def _update(self, q: str, v: list = []) -> None:
         """Execute update (INSERT, UPDATE) SQL query."""
         logger.debug(f"_update query [{q}] [{', '.join(map(str, v))}]")
-        cursor = self._conn.cursor()
-        try:
-            cursor.execute(q, v)
-            self._conn.commit()
-        except sqlite3.Error as e:
-            self._conn.rollback()
-            raise self._get_exception(e)
+        self._count_query()
+        with self._write_lock:
+            conn = self._conn
+            cursor = conn.cursor()
+            try:
+                cursor.execute(q, v)
+                conn.commit()
+            except sqlite3.Error as e:
+                conn.rollback()
+                raise self._get_exception(e)
+            finally:
+                cursor.close()
+
+    def _update_batch(self, writes: list[tuple[str, list[list]]]) -> None:
+        """
+        Execute update (INSERT, UPDATE) SQL queries for their values lists
+        in one transaction. Queries run in writes order.
+        """
+        logger.debug(f"_update_batch [{len(writes)} queries]")
+        self._count_query()
+        with self._write_lock:
+            conn = self._conn
+            cursor = conn.cursor()
+            try:
+                for q, v in writes:
+                    cursor.executemany(q, v)
+                conn.commit()
+            except sqlite3.Error as e:
+                conn.rollback()
+                raise self._get_exception(e)
+            finally:
+                cursor.close()
 
     # Row factories
     def _row_factory(self, rf: dict | int | str = None) -> object:
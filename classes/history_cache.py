@@ -0,0 +1,102 @@
+from collections import OrderedDict
+from threading import Lock
+
+from classes.metrics import Metrics
+from classes.tbot import ReplyMessage
+
+
+class HistoryCache:
+    """
+    Size-bounded LRU cache of rendered history by chat_id.
+    History is kept as list of entries from the last session,
+    entry is tuple of session ReplyMessage instances.
+    Every chat keeps up to max_entries entries.
+    """
+    def __init__(self, max_size: int, max_entries: int) -> None:
+        """Initiate cache by max_size of chats and max_entries of chat."""
+        self._max_size = max_size
+        self._max_entries = max_entries
+        self._items: OrderedDict[int, list[tuple[ReplyMessage, ...]]] = \
+            OrderedDict()
+        self._leases: dict[int, object] = {}
+        self._lock = Lock()
+        self.metrics = Metrics(__name__)
+
+    @property
+    def enabled(self) -> bool:
+        """Return True if cache keeps history."""
+        return self._max_size > 0 and self._max_entries > 0
+
+    def __contains__(self, chat_id: int) -> bool:
+        """Return True if chat history is cached."""
+        with self._lock:
+            return chat_id in self._items
+
+    def _count(self, counter: str) -> None:
+        """Count get result and update hit rate."""
+        self.metrics.incr(counter)
+        hits = self.metrics.get('hits')
+        self.metrics.gauge(
+            'hit rate', hits / (hits + self.metrics.get('misses')))
+
+    def get(self, chat_id: int) -> list[tuple[ReplyMessage, ...]]:
+        """Return chat history entries. None if not cached."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entries = self._items.get(chat_id, None)
+            if entries is not None:
+                self._items.move_to_end(chat_id)
+                self._count('hits')
+                return list(entries)
+        self._count('misses')
+        return None
+
+    def lease(self, chat_id: int) -> object:
+        """
+        Return lease for setting chat history loaded after it.
+        Lease is revoked by adding new entry.
+        """
+        lease = object()
+        with self._lock:
+            self._leases[chat_id] = lease
+        return lease
+
+    def set(
+            self, chat_id: int, entries: list[tuple[ReplyMessage, ...]],
+            lease: object) -> bool:
+        """
+        Return status of saving chat history entries by lease.
+        Evict least recently used chats.
+        """
+        with self._lock:
+            if self._leases.get(chat_id, None) is not lease:
+                self.metrics.incr('revoked')
+                return False
+            del self._leases[chat_id]
+            if not self.enabled:
+                return False
+            self._items[chat_id] = list(entries[:self._max_entries])
+            self._items.move_to_end(chat_id)
+            while len(self._items) > self._max_size:
+                self._items.popitem(last=False)
+                self.metrics.incr('evictions')
+            self.metrics.gauge('size', len(self._items))
+        return True
+
+    def add(self, chat_id: int, entry: tuple[ReplyMessage, ...]) -> None:
+        """Add the last entry to cached chat history."""
+        with self._lock:
+            self._leases.pop(chat_id, None)
+            entries = self._items.get(chat_id, None)
+            if entries is None:
+                return None
+            entries.insert(0, entry)
+            del entries[self._max_entries:]
+
+    def delete(self, chat_id: int) -> None:
+        """Remove chat history by chat_id."""
+        with self._lock:
+            self._leases.pop(chat_id, None)
+            self._items.pop(chat_id, None)
+            self.metrics.gauge('size', len(self._items))
@@ -1,8 +1,17 @@
+from collections.abc import Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
+from math import ceil
+from threading import Event
 
 from app.app_logger import get_logger
-from app.config import API_CURRENCY
+from app.config import (
+    API_CURRENCY, API_MAX_WORKERS, API_POOL_SIZE,
+    API_CACHE_TTL_LOCATIONS, API_CACHE_TTL_SEARCH, API_CACHE_TTL_PHOTOS,
+    API_RATE_LOCATIONS, API_RATE_SEARCH, API_RATE_PHOTOS,
+    BESTDEAL_MAX_PAGES, BESTDEAL_RANK, BESTDEAL_WEIGHTS)
 from classes.basic import Address, Hotel, HotelPhoto, Location, SearchResult
+from classes.ranker import TopKRanker
 from classes.rapidapi import Api
 from classes.user_session import UserSession
 
@@ -63,6 +72,27 @@ class ApiSearchResult:
 
 class HotelsApi(Api):
     """Extended methods for Hotels RapidApi."""
+    _cache_ttls = {
+        'locations/v2/search': API_CACHE_TTL_LOCATIONS,
+        'properties/list': API_CACHE_TTL_SEARCH,
+        'properties/get-hotel-photos': API_CACHE_TTL_PHOTOS
+    }
+    _rates = {
+        'locations/v2/search': API_RATE_LOCATIONS,
+        'properties/list': API_RATE_SEARCH,
+        'properties/get-hotel-photos': API_RATE_PHOTOS
+    }
+    # photos wait for search pages
+    _low_priority = ('properties/get-hotel-photos',)
+    # search pages of all searches are requested by long-lived threads
+    # (up to connections pool size), so threads keep their database
+    # connections of Api usage counters
+    _executor = ThreadPoolExecutor(
+        max_workers=API_POOL_SIZE, thread_name_prefix='HotelsApi')
+    # properties/list page size limits
+    PAGE_SIZE_MAX = 25
+    PAGE_SIZE_RESERVE = 2
+
     # Parsers
     def _parse_location(self, data: dict) -> Location:
         """Parse dict data to Location instance."""
@@ -146,8 +176,13 @@ class HotelsApi(Api):
             raise self.ApiParseError(*e.args, data)
 
     # Getters
-    def get_locations(self, location_name: str) -> list[Location]:
-        """Return Location instances list by API request results."""
+    def get_locations(
+            self, location_name: str, strict: bool = False) -> list[Location]:
+        """
+        Return Location instances list by API request results.
+        Raise ApiRequestError and ApiParseError instead of returning
+        empty list on errors if strict.
+        """
         url = f'{self._base_url}/locations/v2/search'
         params = {
             'query': location_name,
@@ -157,6 +192,8 @@ class HotelsApi(Api):
         try:
             data = self._get(url, params)
         except self.ApiRequestError:
+            if strict:
+                raise
             return []
         try:
             for suggestion in data['suggestions']:
@@ -167,6 +204,8 @@ class HotelsApi(Api):
                 logger.debug('get_locations return None.')
                 return []
         except KeyError as e:
+            if strict:
+                raise self.ApiParseError(*e.args, data)
             logger.error(
                 f"get_locations error: [{' '.join(map(str, *e.args))}]")
             return []
@@ -185,11 +224,178 @@ class HotelsApi(Api):
                 pass
         return locations
 
+    def _get_search_page(
+            self, url: str, params: dict, page: int) -> tuple[int, list]:
+        """
+        Return totalCount and results data of search page.
+        Raise ApiRequestError on request failed.
+        Raise ApiParseError on invalid responce structure.
+        """
+        params = {**params, 'pageNumber': str(page)}
+        data = self._get(url, params)
+        try:
+            search_results = data['data']['body']['searchResults']
+            return int(search_results['totalCount']), search_results['results']
+        except (KeyError, ValueError) as e:
+            raise self.ApiParseError(*e.args)
+
+    def _parse_search_page(
+            self, user_session: UserSession,
+            results_data: list) -> list[ApiSearchResult]:
+        """Return ApiSearchResult instances list from page results data."""
+        results = []
+        for result_data in results_data:
+            try:
+                result = self._parse_search_result(result_data)
+            except self.ApiParseError:
+                continue
+            result.add_session(user_session)
+            results.append(result)
+        return results
+
+    def _check_search_result(
+            self, user_session: UserSession, result: ApiSearchResult) -> bool:
+        """
+        Return True if ApiSearchResult instance fits UserSession.
+        Filtered by distance and price for /bestdeal command.
+        """
+        if not user_session.command == '/bestdeal':
+            return True
+        return user_session.distance_min <= result.distance <= \
+            user_session.distance_max and \
+            user_session.price_min <= result.price <= user_session.price_max
+
+    def _is_page_below(
+            self, user_session: UserSession,
+            results: list[ApiSearchResult]) -> bool:
+        """
+        Return True if all /bestdeal page results are closer
+        than distance_min.
+        """
+        return len(results) > 0 and \
+            max(x.distance for x in results) < user_session.distance_min
+
+    def _is_page_beyond(
+            self, user_session: UserSession,
+            results: list[ApiSearchResult]) -> bool:
+        """
+        Return True if /bestdeal page results reach hotels further
+        than distance_max. Next pages are further (sorted by distance).
+        """
+        return len(results) > 0 and \
+            max(x.distance for x in results) > user_session.distance_max
+
+    def _is_bestdeal_over(
+            self, user_session: UserSession, ranker: TopKRanker,
+            results: list[ApiSearchResult], merged: int) -> bool:
+        """
+        Return True if next /bestdeal pages can not change results:
+        page reaches distance_max, top-k can not be improved by further
+        hotels or BESTDEAL_MAX_PAGES pages are merged.
+        """
+        if self._is_page_beyond(user_session, results):
+            return True
+        if len(results) > 0 and not ranker.can_improve(
+                max(x.distance for x in results)):
+            return True
+        return 0 < BESTDEAL_MAX_PAGES <= merged
+
+    def _fetch_search_pages(
+            self, executor: ThreadPoolExecutor, url: str, params: dict,
+            user_session: UserSession,
+            pages: list[int]) -> dict[int, list[ApiSearchResult]]:
+        """
+        Return parsed results by page of pages requested in parallel.
+        Raise ApiRequestError or ApiParseError on failed page.
+        """
+        futures = {page: executor.submit(
+            self._get_search_page, url, params, page) for page in pages}
+        return {page: self._parse_search_page(
+            user_session, future.result()[1])
+            for page, future in futures.items()}
+
+    def _skip_pages_below(
+            self, executor: ThreadPoolExecutor, url: str, params: dict,
+            user_session: UserSession, total_pages: int,
+            fetched: dict[int, list[ApiSearchResult]]) -> int:
+        """
+        Return first /bestdeal page with hotels not closer than
+        distance_min. Page 1 is below distance_min.
+        Pages are probed by galloping (2, 4, 8...) in parallel windows
+        and binary search between last page below and first page not below.
+        Parsed results of probed pages are added to fetched.
+        Raise ApiRequestError or ApiParseError on failed page.
+        """
+        below, above = 1, total_pages + 1
+        probe = 1
+        while above > total_pages and below < total_pages:
+            probes = []
+            while len(probes) < API_MAX_WORKERS and probe < total_pages:
+                probe = min(probe * 2, total_pages)
+                probes.append(probe)
+            fetched.update(self._fetch_search_pages(
+                executor, url, params, user_session, probes))
+            for page in probes:
+                if not self._is_page_below(user_session, fetched[page]):
+                    above = page
+                    break
+                below = page
+        # binary search
+        while above - below > 1:
+            page = (below + above) // 2
+            fetched.update(self._fetch_search_pages(
+                executor, url, params, user_session, [page]))
+            if self._is_page_below(user_session, fetched[page]):
+                below = page
+            else:
+                above = page
+        logger.debug(f'search skipped pages below distance_min [{below}]')
+        return above
+
     def get_search_results(
             self, user_session: UserSession) -> list[ApiSearchResult]:
         """Return ApiSearchResult instances list by API request result."""
+        return list(self.iter_search_results(user_session))
+
+    def _plan_page_size(self, user_session: UserSession) -> int:
+        """
+        Return page size for search.
+        Results of /lowprice and /highprice are not filtered, so one page
+        of results_num (and reserve for parse errors) is enough.
+        """
+        if user_session.command == '/bestdeal':
+            return self.PAGE_SIZE_MAX
+        return min(
+            self.PAGE_SIZE_MAX,
+            user_session.results_num + self.PAGE_SIZE_RESERVE)
+
+    def _plan_pages(
+            self, needed: int, seen: int, matched: int,
+            page_size: int, pages_left: int) -> int:
+        """
+        Return number of pages for next parallel requests window
+        by filter selectivity (matched of seen results) so far.
+        """
+        if seen == 0 or matched == 0:
+            pages = API_MAX_WORKERS
+        else:
+            pages = ceil(needed * seen / (matched * page_size))
+        return max(1, min(pages, API_MAX_WORKERS, pages_left))
+
+    def iter_search_results(
+            self, user_session: UserSession,
+            cancelled: Event = None) -> Iterator[ApiSearchResult]:
+        """
+        Yield ApiSearchResult instances by API request result
+        as soon as they are parsed.
+        Pages after the first are requested in parallel windows planned
+        by filter selectivity. No more pages are requested after
+        cancelled is set.
+        /bestdeal results are sorted by distance, so pages closer than
+        distance_min are skipped and search stops after distance_max.
+        """
         url = f'{self._base_url}/properties/list'
-        page_size = 25
+        page_size = self._plan_page_size(user_session)
         # prepare params
         params = {
             'destinationId': str(user_session.location_id),
@@ -201,6 +407,7 @@ class HotelsApi(Api):
             'currency': self._currency
         }
         # add params by command
+        bestdeal = False
         match user_session.command:
             case '/lowprice':
                 params['sortOrder'] = 'PRICE'
@@ -210,59 +417,127 @@ class HotelsApi(Api):
                 params['sortOrder'] = 'DISTANCE_FROM_LANDMARK'
                 params['minPrice'] = int(user_session.price_min)
                 params['maxPrice'] = int(user_session.price_max)
-        # process requests
-        page = 1
-        result_counter = 0
-        results = []
-        while True:
-            params['pageNumber'] = str(page)
-            try:
-                data = self._get(url, params)
-            except self.ApiRequestError:
-                break
-            # get results
+                bestdeal = True
+        needed = user_session.results_num
+        seen = 0
+        # pages requested and pages merged into results
+        pages = 1
+        merged = 0
+        # /bestdeal results are ranked in bounded top-k
+        ranker = None
+        if bestdeal:
+            ranker = TopKRanker(
+                user_session.results_num, BESTDEAL_RANK,
+                (user_session.price_min, user_session.price_max),
+                (user_session.distance_min, user_session.distance_max),
+                BESTDEAL_WEIGHTS)
+        executor = self._executor
+        # pages requested by windows
+        submitted: list[Future] = []
+        try:
+            # first page gives totalCount
             try:
-                results_num = int(
-                    data['data']['body']['searchResults']['totalCount'])
-                results_data = data['data']['body']['searchResults']['results']
-            except KeyError as e:
-                logger.error(
-                    f"get_search_results error [{' '.join(map(str, *e.args))}]"
-                )
-                break
-            # parse results
-            for result_data in results_data:
-                if len(results) >= user_session.results_num:
-                    return results
-                result_counter += 1
-                try:
-                    result = self._parse_search_result(result_data)
-                    result.add_session(user_session)
-                    if not user_session.command == '/bestdeal':
-                        results.append(result)
-                        continue
-                    # check Hotel distance
-                    if user_session.distance_min <= result.distance <= \
-                        user_session.distance_max and \
-                        user_session.price_min <= result.price <= \
-                            user_session.price_max:
-                        results.append(result)
-                except self.ApiParseError:
-                    pass
-            page += 1
-            # check last page
-            if result_counter // page_size >= results_num // page_size:
-                break
-        return results
+                total_count, results_data = self._get_search_page(
+                    url, params, 1)
+                total_pages = ceil(total_count / page_size)
+                fetched = {1: self._parse_search_page(
+                    user_session, results_data)}
+                next_page = 1
+                if bestdeal and self._is_page_below(user_session, fetched[1]):
+                    next_page = self._skip_pages_below(
+                        executor, url, params, user_session,
+                        total_pages, fetched)
+                    pages = len(fetched)
+            except (self.ApiRequestError, self.ApiParseError):
+                logger.error('get_search_results error [first page]')
+                return None
+            # pages by planned windows
+            stop = False
+            while next_page <= total_pages and not stop:
+                if cancelled is not None and cancelled.is_set():
+                    logger.debug(f'search cancelled [{next_page}]')
+                    return None
+                if next_page in fetched:
+                    window = [next_page]
+                else:
+                    pages_left = total_pages - next_page + 1
+                    # window is not wider than pages left to merge
+                    if bestdeal and BESTDEAL_MAX_PAGES > 0:
+                        pages_left = min(
+                            pages_left, BESTDEAL_MAX_PAGES - merged)
+                    window_size = self._plan_pages(
+                        needed or user_session.results_num, seen,
+                        user_session.results_num - needed,
+                        page_size, pages_left)
+                    window = list(range(next_page, next_page + window_size))
+                next_page = window[-1] + 1
+                futures = {page: executor.submit(
+                    self._get_search_page, url, params, page)
+                    for page in window if page not in fetched}
+                submitted.extend(futures.values())
+                pages += len(futures)
+                # merge in page order
+                for page in window:
+                    results = fetched.pop(page, None)
+                    if results is None:
+                        try:
+                            _, results_data = futures[page].result()
+                        except (self.ApiRequestError, self.ApiParseError):
+                            logger.error(
+                                f'get_search_results error [page {page}]')
+                            stop = True
+                            break
+                        results = self._parse_search_page(
+                            user_session, results_data)
+                    seen += len(results)
+                    merged += 1
+                    for result in results:
+                        if not self._check_search_result(
+                                user_session, result):
+                            continue
+                        if ranker is not None:
+                            ranker.push(result)
+                            needed = user_session.results_num - len(ranker)
+                            continue
+                        yield result
+                        needed -= 1
+                        if needed <= 0:
+                            return None
+                    if bestdeal and self._is_bestdeal_over(
+                            user_session, ranker, results, merged):
+                        logger.debug(f'search bestdeal over [{page}]')
+                        # do not request pages while results are sent
+                        for future in submitted:
+                            future.cancel()
+                        yield from ranker.results
+                        return None
+            if ranker is not None:
+                yield from ranker.results
+        finally:
+            # do not request pages not needed anymore
+            for future in submitted:
+                future.cancel()
+            self.metrics.observe('search pages', pages)
+            logger.debug((
+                f'search [{user_session.command}] pages {pages} '
+                f'page size {page_size} seen {seen} '
+                f'found {user_session.results_num - needed}'))
 
     def get_hotel_photos(
-                self, hotel: Hotel, limit: int = 0) -> list[HotelPhoto]:
-        """Return HotelPhoto instances list by API request result."""
+                self, hotel: Hotel, limit: int = 0,
+                strict: bool = False) -> list[HotelPhoto]:
+        """
+        Return HotelPhoto instances list by API request result.
+        Raise ApiRequestError and ApiParseError instead of returning
+        empty list on errors if strict.
+        """
         url = f'{self._base_url}/properties/get-hotel-photos'
         params = {'id': hotel.id}
         try:
             data = self._get(url, params)
         except self.ApiRequestError:
+            if strict:
+                raise
             return []
         hotel_photos = []
         try:
@@ -274,6 +549,8 @@ class HotelsApi(Api):
                 if limit > 0 and len(hotel_photos) >= limit:
                     break
         except KeyError as e:
+            if strict:
+                raise self.ApiParseError(*e.args, data)
             logger.error(
                 f"get_hotel_photos error: [{' '.join(map(str, *e.args))}]")
             return []
@@ -0,0 +1,179 @@
+from collections import Counter
+from threading import Lock
+
+from app.app_logger import get_logger
+from classes.basic import Location
+from classes.metrics import Metrics
+
+
+# initiate logger
+logger = get_logger(__name__)
+
+
+class LocationIndex:
+    """
+    In-memory typo and transliteration tolerant index of Location instances.
+    Names are normalized to latin transliteration, candidates are found
+    by trigrams and ranked by edit distance.
+    """
+    # latin letters looking like cyrillic ones
+    _HOMOGLYPHS = str.maketrans({
+        'a': 'а', 'c': 'с', 'e': 'е', 'o': 'о', 'p': 'р', 'x': 'х',
+        'y': 'у', 'k': 'к', 'm': 'м', 't': 'т', 'b': 'в', 'h': 'н'
+    })
+    _TRANSLIT = str.maketrans({
+        'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e',
+        'ё': 'e', 'ж': 'zh', 'з': 'z', 'и': 'i', 'й': 'y', 'к': 'k',
+        'л': 'l', 'м': 'm', 'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r',
+        'с': 's', 'т': 't', 'у': 'u', 'ф': 'f', 'х': 'kh', 'ц': 'ts',
+        'ч': 'ch', 'ш': 'sh', 'щ': 'shch', 'ъ': '', 'ы': 'y', 'ь': '',
+        'э': 'e', 'ю': 'yu', 'я': 'ya'
+    })
+    # max trigrams changed by one edit (transposition)
+    EDIT_TRIGRAMS = 4
+    # postings longer than it are not counted if possible
+    MAX_POSTING = 1000
+
+    def __init__(self, locations: list[Location] = None) -> None:
+        """Initiate index by Location instances list."""
+        self._lock = Lock()
+        self._locations: dict[str, list[Location]] = {}
+        self._trigrams: dict[str, set[str]] = {}
+        self.metrics = Metrics(__name__)
+        for location in locations or []:
+            self.add(location)
+        logger.debug(f'LocationIndex built [{len(self._locations)} names].')
+
+    @classmethod
+    def normalize(cls, text: str) -> str:
+        """
+        Return text normalized for matching:
+        lowercase latin transliteration without spaces and punctuation.
+        Latin homoglyphs in cyrillic words are replaced before.
+        """
+        text = text.lower()
+        if any('а' <= x <= 'я' or x == 'ё' for x in text):
+            text = text.translate(cls._HOMOGLYPHS)
+        text = text.translate(cls._TRANSLIT)
+        return ''.join(x for x in text if x.isalnum())
+
+    @staticmethod
+    def _get_trigrams(key: str) -> set[str]:
+        """Return trigrams of padded key."""
+        padded = f'  {key} '
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+    @staticmethod
+    def _distance(a: str, b: str, max_distance: int) -> int:
+        """
+        Return edit distance of a and b with adjacent transpositions
+        (optimal string alignment).
+        Return max_distance + 1 if distance is greater than max_distance.
+        """
+        if abs(len(a) - len(b)) > max_distance:
+            return max_distance + 1
+        before = None
+        previous = list(range(len(b) + 1))
+        for i, char_a in enumerate(a, 1):
+            current = [i]
+            for j, char_b in enumerate(b, 1):
+                value = min(
+                    previous[j] + 1,
+                    current[j - 1] + 1,
+                    previous[j - 1] + (char_a != char_b))
+                if before is not None and j > 1 and \
+                        char_a == b[j - 2] and a[i - 2] == char_b:
+                    value = min(value, before[j - 2] + 1)
+                current.append(value)
+            if min(current) > max_distance and min(previous) > max_distance:
+                return max_distance + 1
+            before, previous = previous, current
+        return min(previous[-1], max_distance + 1)
+
+    @staticmethod
+    def _max_distance(key: str) -> int:
+        """Return allowed edit distance by key length."""
+        if len(key) <= 4:
+            return 0
+        if len(key) <= 8:
+            return 1
+        return 2
+
+    def add(self, location: Location) -> None:
+        """Add Location instance to index."""
+        key = self.normalize(location.name)
+        if len(key) == 0:
+            return None
+        with self._lock:
+            locations = self._locations.setdefault(key, [])
+            if any(x.destination_id == location.destination_id
+                   for x in locations):
+                return None
+            locations.append(location)
+            for trigram in self._get_trigrams(key):
+                self._trigrams.setdefault(trigram, set()).add(key)
+            self.metrics.gauge('names', len(self._locations))
+
+    def _rank_candidates(
+            self, key: str, max_distance: int) -> list[tuple[int, int, str]]:
+        """
+        Return (distance, -common trigrams, name) list of names
+        not farther than max_distance from key sorted by similarity.
+        Names within max_distance share all trigrams of key
+        but EDIT_TRIGRAMS per edit, so the longest postings are skipped
+        while the rest can still prove the lack of common trigrams.
+        """
+        trigrams = self._get_trigrams(key)
+        min_common = len(trigrams) - self.EDIT_TRIGRAMS * max_distance
+        postings = sorted(
+            (self._trigrams.get(x, ()) for x in trigrams), key=len)
+        # rarest postings to count
+        counted = len(postings)
+        if min_common > 0:
+            counted = len(postings) - min_common + 1
+            while counted < len(postings) and \
+                    len(postings[counted]) <= self.MAX_POSTING:
+                counted += 1
+        counts = Counter()
+        for posting in postings[:counted]:
+            counts.update(posting)
+        min_count = max(1, min_common - (len(postings) - counted))
+        ranked = []
+        for candidate, count in counts.items():
+            if count < min_count or \
+                    abs(len(candidate) - len(key)) > max_distance:
+                continue
+            distance = self._distance(key, candidate, max_distance)
+            if distance <= max_distance:
+                ranked.append((distance, -count, candidate))
+        ranked.sort()
+        return ranked
+
+    def search(
+            self, name: str, limit: int = 0,
+            fuzzy: bool = True) -> list[Location]:
+        """
+        Return Location instances list ranked by name similarity.
+        Only normalized name equal to name is matched if not fuzzy.
+        Can be limited.
+        """
+        key = self.normalize(name)
+        if len(key) == 0:
+            return []
+        max_distance = self._max_distance(key)
+        with self._lock:
+            if key in self._locations:
+                ranked = [(0, 0, key)]
+            elif fuzzy and max_distance > 0:
+                ranked = self._rank_candidates(key, max_distance)
+            else:
+                ranked = []
+            locations = []
+            for _, _, candidate in ranked:
+                locations += sorted(
+                    self._locations[candidate],
+                    key=lambda x: x.destination_id)
+        self.metrics.incr('hits' if len(locations) > 0 else 'misses')
+        if 0 < limit < len(locations):
+            return locations[:limit]
+        return locations
@@ -0,0 +1,108 @@
+from threading import Event, Lock, Thread
+from weakref import WeakSet
+
+from app.app_logger import get_logger
+
+
+# initiate logger
+logger = get_logger(__name__)
+# all alive Metrics instances
+_registry: WeakSet['Metrics'] = WeakSet()
+_registry_lock = Lock()
+
+
+class Metrics:
+    """Thread-safe counters, gauges and statistics for application parts."""
+    def __init__(self, name: str) -> None:
+        """Initiate empty metrics with name and register them."""
+        self.name = name
+        self._lock = Lock()
+        self._counters = {}
+        self._stats = {}
+        self._gauges = {}
+        with _registry_lock:
+            _registry.add(self)
+
+    def incr(self, counter: str, value: int = 1) -> None:
+        """Increase counter by value."""
+        with self._lock:
+            self._counters[counter] = self._counters.get(counter, 0) + value
+
+    def gauge(self, gauge: str, value: object) -> None:
+        """Set gauge value."""
+        with self._lock:
+            self._gauges[gauge] = value
+
+    def observe(self, stat: str, value: float) -> None:
+        """Add value (seconds for timings) to statistic."""
+        with self._lock:
+            count, total, max_value = self._stats.get(stat, (0, 0.0, 0.0))
+            self._stats[stat] = (
+                count + 1, total + value, max(max_value, value))
+
+    def get(self, counter: str) -> int:
+        """Return counter value."""
+        with self._lock:
+            return self._counters.get(counter, 0)
+
+    @property
+    def data(self) -> dict:
+        """Return metrics snapshot in dict."""
+        with self._lock:
+            stats = {}
+            for stat, (count, total, max_value) in self._stats.items():
+                stats[stat] = {
+                    'count': count,
+                    'avg': total / count if count else 0.0,
+                    'max': max_value
+                }
+            return {
+                'counters': dict(self._counters),
+                'gauges': dict(self._gauges),
+                'stats': stats
+            }
+
+    def __str__(self) -> str:
+        """Return metrics snapshot in string."""
+        return f'{self.name} {self.data}'
+
+
+def get_all_metrics() -> list[Metrics]:
+    """Return all alive Metrics instances sorted by name."""
+    with _registry_lock:
+        registry = list(_registry)
+    return sorted(registry, key=lambda x: x.name)
+
+
+class MetricsReporter:
+    """Thread logging all alive Metrics instances every interval seconds."""
+    def __init__(self, interval: float) -> None:
+        """Initiate reporter by interval. Start it if interval is set."""
+        self._interval = interval
+        self._stopped = Event()
+        self._thread = None
+        if self._interval > 0:
+            self._thread = Thread(
+                target=self._run, name='MetricsReporter', daemon=True)
+            self._thread.start()
+
+    def report(self) -> None:
+        """Log not empty metrics."""
+        for metrics in get_all_metrics():
+            data = metrics.data
+            if any(data.values()):
+                logger.info(f'{metrics.name} {data}')
+
+    def _run(self) -> None:
+        """Report metrics until stopped."""
+        while not self._stopped.wait(self._interval):
+            self.report()
+
+    def close(self) -> None:
+        """Stop reporter and log metrics last time."""
+        if self._stopped.is_set():
+            return None
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self.report()
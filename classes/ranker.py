@@ -0,0 +1,100 @@
+from heapq import heappush, heappushpop
+from itertools import count
+
+
+class TopKRanker:
+    """
+    Bounded top-k ranker of search results (ApiSearchResult instances)
+    by price, distance and star_rating attributes.
+    Keep only k best results in heap. Lower rank is better.
+    Rank keys:
+    - price: lowest price first
+    - distance: closest to city center first
+    - star_rating: highest star rating first
+    - score: weighted sum of normalized price, distance and star rating
+    """
+    KEYS = ('price', 'distance', 'star_rating', 'score')
+    MAX_STAR_RATING = 5
+
+    def __init__(
+            self, k: int, key: str = 'price',
+            price_range: tuple[float, float] = (0.0, 0.0),
+            distance_range: tuple[float, float] = (0.0, 0.0),
+            weights: tuple[float, float, float] = (1.0, 1.0, 1.0)) -> None:
+        """
+        Initiate ranker by k, key and search ranges.
+        weights are price, distance and star rating weights for score key.
+        Raise ValueError on invalid key.
+        """
+        if key not in self.KEYS:
+            raise ValueError(f'Invalid rank key [{key}].')
+        self._k = k
+        self._key = key
+        self._price_range = price_range
+        self._distance_range = distance_range
+        self._weights = weights
+        # max-heap by rank: (-rank, -order, result)
+        self._heap: list[tuple[float, int, object]] = []
+        self._order = count()
+
+    def __len__(self) -> int:
+        """Return number of kept results."""
+        return len(self._heap)
+
+    @property
+    def full(self) -> bool:
+        """Return True if ranker keeps k results."""
+        return len(self._heap) >= self._k
+
+    @staticmethod
+    def _normalize(value: float, value_range: tuple[float, float]) -> float:
+        """Return value normalized to 0..1 by value_range."""
+        low, high = value_range
+        if high <= low:
+            return 0.0
+        return min(1.0, max(0.0, (value - low) / (high - low)))
+
+    def _rank(self, price: float, distance: float, star_rating: int) -> float:
+        """Return rank of values by key."""
+        match self._key:
+            case 'price':
+                return price
+            case 'distance':
+                return distance
+            case 'star_rating':
+                return -star_rating
+            case _:
+                w_price, w_distance, w_star = self._weights
+                return (
+                    w_price * self._normalize(price, self._price_range)
+                    + w_distance * self._normalize(
+                        distance, self._distance_range)
+                    - w_star * star_rating / self.MAX_STAR_RATING)
+
+    def push(self, result: object) -> bool:
+        """Return True if result is kept in top-k."""
+        if self._k <= 0:
+            return False
+        rank = self._rank(result.price, result.distance, result.star_rating)
+        item = (-rank, -next(self._order), result)
+        if not self.full:
+            heappush(self._heap, item)
+            return True
+        return heappushpop(self._heap, item) is not item
+
+    def can_improve(self, min_distance: float) -> bool:
+        """
+        Return True if results not closer than min_distance
+        can change top-k.
+        """
+        if not self.full:
+            return True
+        best_rank = self._rank(
+            self._price_range[0], min_distance, self.MAX_STAR_RATING)
+        worst_rank = -self._heap[0][0]
+        return best_rank < worst_rank
+
+    @property
+    def results(self) -> list:
+        """Return top-k results from best to worst."""
+        return [x[2] for x in sorted(self._heap, reverse=True)]
@@ -1,19 +1,98 @@
-from requests import request
+from requests import Session
+from requests.adapters import HTTPAdapter
 from requests.exceptions import RequestException
 from json import loads
+from random import uniform
+from threading import Event, Lock
+from time import monotonic, perf_counter, sleep
 
 from app.app_logger import get_logger
-from app.config import API_HOST, API_KEY, API_LOCALE, API_CURRENCY
+from app.config import (
+    API_HOST, API_KEY, API_LOCALE, API_CURRENCY,
+    API_POOL_SIZE, API_CONNECT_TIMEOUT, API_READ_TIMEOUT,
+    API_CACHE_SIZE, API_CACHE_ENGINE,
+    API_RATE, API_RATE_BURST, API_RATE_RESERVE,
+    API_DAILY_LIMIT, API_MONTHLY_LIMIT,
+    API_RETRIES, API_RETRY_BACKOFF, API_RETRY_DEADLINE,
+    API_BREAKER_THRESHOLD, API_BREAKER_RESET)
+from classes.api_cache import ApiCache, ApiCacheStorage
+from classes.circuit_breaker import CircuitBreaker
+from classes.metrics import Metrics
+from classes.rate_limiter import ApiQuota, RateLimiter
 
 
 # initiate logger
 logger = get_logger(__name__)
 
 
+class SingleFlight:
+    """
+    Coalesce identical concurrent calls.
+    Callers of a call already in flight wait for its result.
+    """
+    class _Call:
+        """Call in flight."""
+        def __init__(self) -> None:
+            self.done = Event()
+            self.result = None
+            self.error = None
+
+    def __init__(self) -> None:
+        """Initiate empty calls registry."""
+        self._lock = Lock()
+        self._calls: dict[str, SingleFlight._Call] = {}
+        self.metrics = Metrics(f'{__name__}.SingleFlight')
+
+    def do(self, key: str, func: callable, *args) -> object:
+        """
+        Return func(*args) result.
+        Wait for the call in flight by key instead of calling func.
+        """
+        with self._lock:
+            call = self._calls.get(key, None)
+            leader = call is None
+            if leader:
+                call = self._Call()
+                self._calls[key] = call
+        if not leader:
+            self.metrics.incr('coalesced')
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        self.metrics.incr('calls')
+        try:
+            call.result = func(*args)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
 class Api:
     """Basic class for rapidapi connections."""
-    def __init__(self) -> None:
-        """Initiate RapidApi connection from environment attributes."""
+    # keep-alive connection pool shared by all instances and threads
+    _session: Session = None
+    _session_lock = Lock()
+    # responses cache time in seconds by endpoint
+    _cache_ttls: dict[str, int] = {}
+    # requests per second by endpoint and low priority endpoints
+    _rates: dict[str, float] = {}
+    _low_priority: tuple = ()
+    # identical requests in flight shared by all instances and threads
+    _flight = SingleFlight()
+    _breaker = CircuitBreaker(API_BREAKER_THRESHOLD, API_BREAKER_RESET)
+    metrics = Metrics(__name__)
+
+    def __init__(self, usage_storage: object = None) -> None:
+        """
+        Initiate RapidApi connection from environment attributes.
+        Api usage counters are kept in usage_storage (DB instance).
+        """
         self._base_url = f'https://{API_HOST}'
         self._headers = {
             'x-rapidapi-host': API_HOST,
@@ -21,23 +100,130 @@ class Api:
         }
         self._locale = API_LOCALE
         self._currency = API_CURRENCY
+        self._timeout = (API_CONNECT_TIMEOUT, API_READ_TIMEOUT)
+        self._cache = None
+        if API_CACHE_SIZE > 0 and len(self._cache_ttls) > 0:
+            storage = None
+            if len(API_CACHE_ENGINE) > 0:
+                storage = ApiCacheStorage(API_CACHE_ENGINE)
+            self._cache = ApiCache(API_CACHE_SIZE, self._cache_ttls, storage)
+        self._limiter = RateLimiter(
+            API_RATE, API_RATE_BURST, API_RATE_RESERVE,
+            self._rates, self._low_priority)
+        self._quota = ApiQuota(
+            API_DAILY_LIMIT, API_MONTHLY_LIMIT, usage_storage)
+
+    def close(self) -> None:
+        """Save Api usage counters."""
+        self._quota.close()
+
+    @classmethod
+    def _get_session(cls) -> Session:
+        """Return shared requests Session with keep-alive connection pool."""
+        if cls._session is None:
+            with cls._session_lock:
+                if cls._session is None:
+                    session = Session()
+                    adapter = HTTPAdapter(
+                        pool_connections=1,
+                        pool_maxsize=API_POOL_SIZE,
+                        pool_block=True)
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    cls._session = session
+                    logger.debug(
+                        f'rapidapi session created [pool {API_POOL_SIZE}].')
+        return cls._session
+
+    def _endpoint(self, url: str) -> str:
+        """Return endpoint name of url."""
+        return url.replace(self._base_url, '').strip('/')
 
     def _get(self, url: str, params: dict, method: str = 'GET') -> dict:
         """Return response result from url by method."""
         logger.debug(
             f"rapidapi _get call [{' '.join(map(str, params.values()))}]")
+        endpoint = self._endpoint(url)
+        if self._cache is not None and method == 'GET':
+            data = self._cache.get(endpoint, params)
+            if data is not None:
+                return data
+        key = f'{method} {ApiCache.key(endpoint, params)}'
+        return self._flight.do(key, self._request, url, params, method)
+
+    def _request(self, url: str, params: dict, method: str) -> dict:
+        """
+        Return response result of request to url by method.
+        Retry on connection errors, 429 and 5xx responses with jittered
+        exponential backoff until API_RETRY_DEADLINE.
+        """
+        endpoint = self._endpoint(url)
+        deadline = monotonic() + API_RETRY_DEADLINE
+        attempt = 0
+        while True:
+            if not self._limiter.acquire(
+                    endpoint, max(0.0, deadline - monotonic())):
+                raise self.ApiRequestError('rate limit', endpoint)
+            if not self._breaker.allow():
+                raise self.ApiCircuitOpenError('circuit open', endpoint)
+            if not self._quota.spend(endpoint):
+                self._breaker.release()
+                raise self.ApiQuotaError('quota exceeded', endpoint)
+            data, error = self._send(url, params, method)
+            if error is None:
+                return data
+            # retry
+            backoff = uniform(0, API_RETRY_BACKOFF * 2 ** attempt)
+            attempt += 1
+            if attempt > API_RETRIES or \
+                    monotonic() + backoff >= deadline:
+                raise self.ApiRequestError(*error)
+            self.metrics.incr(f'{endpoint} retries')
+            logger.warning(
+                f"rapidapi retry {attempt} [{endpoint}] "
+                f"[{' '.join(map(str, error))}] in {backoff:.2f} s")
+            sleep(backoff)
+
+    def _send(
+            self, url: str, params: dict, method: str) -> tuple[dict, tuple]:
+        """
+        Return response result of one request to url by method
+        and error args tuple if request can be retried.
+        """
+        endpoint = self._endpoint(url)
+        start = perf_counter()
         try:
-            response = request(
+            response = self._get_session().request(
                 method=method,
                 url=url,
                 params=params,
-                headers=self._headers
+                headers=self._headers,
+                timeout=self._timeout
             )
         except RequestException as e:
-            raise self.ApiRequestError(*e.args)
+            self.metrics.incr(f'{endpoint} errors')
+            self._breaker.failure()
+            return None, e.args
+        finally:
+            elapsed = perf_counter() - start
+            self.metrics.observe(endpoint, elapsed)
+            logger.debug(f'rapidapi _get [{endpoint}] {elapsed * 1000:.1f} ms')
         if not response.ok:
-            raise self.ApiRequestError('status code', response.status_code)
-        return loads(response.text)
+            self.metrics.incr(f'{endpoint} errors')
+            error = ('status code', response.status_code)
+            if response.status_code == 429:
+                self._breaker.release()
+                return None, error
+            if response.status_code >= 500:
+                self._breaker.failure()
+                return None, error
+            self._breaker.success()
+            raise self.ApiRequestError(*error)
+        self._breaker.success()
+        data = loads(response.text)
+        if self._cache is not None and method == 'GET':
+            self._cache.set(endpoint, params, data)
+        return data, None
 
     # Exceptions
     class _ApiError(Exception):
@@ -58,6 +244,16 @@ class Api:
         _log_level = logger.ERROR
         _msg = 'Request error'
 
+    class ApiQuotaError(ApiRequestError):
+        """Exception for exceeded Api calls budget."""
+        _log_level = logger.WARNING
+        _msg = 'Quota error'
+
+    class ApiCircuitOpenError(ApiRequestError):
+        """Exception for requests stopped by circuit breaker."""
+        _log_level = logger.WARNING
+        _msg = 'Circuit open'
+
     class ApiParseError(_ApiError):
         """Exception for parse request data errors."""
         _log_level = logger.ERROR
@@ -0,0 +1,209 @@
+from datetime import date
+from threading import Condition, Event, Lock, Thread
+from time import monotonic
+
+from app.app_logger import get_logger
+from classes.metrics import Metrics
+
+
+# initiate logger
+logger = get_logger(__name__)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket by rate (tokens per second) and capacity.
+    Rate 0 is unlimited.
+    """
+    def __init__(self, rate: float, capacity: float) -> None:
+        """Initiate full bucket."""
+        self._rate = rate
+        self._capacity = max(capacity, 1.0)
+        self._tokens = self._capacity
+        self._updated = monotonic()
+        self._cond = Condition(Lock())
+
+    def _refill(self) -> None:
+        """Add tokens by time passed."""
+        now = monotonic()
+        self._tokens = min(
+            self._capacity, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def acquire(self, reserve: float = 0.0, timeout: float = None) -> bool:
+        """
+        Return status of taking one token.
+        Token is taken only if reserve tokens stay in bucket after it.
+        Wait for tokens no longer than timeout seconds.
+        """
+        if self._rate <= 0:
+            return True
+        deadline = None if timeout is None else monotonic() + timeout
+        need = 1.0 + min(reserve, self._capacity - 1.0)
+        with self._cond:
+            while True:
+                self._refill()
+                if self._tokens >= need:
+                    self._tokens -= 1.0
+                    return True
+                wait = (need - self._tokens) / self._rate
+                if deadline is not None:
+                    left = deadline - monotonic()
+                    if left <= 0:
+                        return False
+                    wait = min(wait, left)
+                self._cond.wait(wait)
+
+
+class RateLimiter:
+    """
+    Client-side rate limiter with one plan-wide bucket and bucket by endpoint.
+    Low priority endpoints leave reserve tokens of the plan-wide bucket
+    to high priority ones.
+    """
+    def __init__(
+            self, rate: float, burst: float, reserve: float,
+            endpoint_rates: dict[str, float],
+            low_priority: tuple = ()) -> None:
+        """Initiate buckets."""
+        self._bucket = TokenBucket(rate, burst)
+        self._reserve = reserve
+        self._endpoint_buckets = {
+            endpoint: TokenBucket(endpoint_rate, burst)
+            for endpoint, endpoint_rate in endpoint_rates.items()
+            if endpoint_rate > 0
+        }
+        self._low_priority = low_priority
+        self.metrics = Metrics(f'{__name__}.RateLimiter')
+
+    def acquire(self, endpoint: str, timeout: float = None) -> bool:
+        """Return status of permission to request endpoint."""
+        start = monotonic()
+        bucket = self._endpoint_buckets.get(endpoint, None)
+        if bucket is not None and not bucket.acquire(timeout=timeout):
+            self.metrics.incr(f'{endpoint} rejected')
+            return False
+        reserve = self._reserve if endpoint in self._low_priority else 0.0
+        if timeout is not None:
+            timeout = max(0.0, timeout - (monotonic() - start))
+        if not self._bucket.acquire(reserve, timeout):
+            self.metrics.incr(f'{endpoint} rejected')
+            return False
+        self.metrics.observe(f'{endpoint} wait', monotonic() - start)
+        return True
+
+
+class ApiQuota:
+    """
+    Daily and monthly Api calls budget.
+    Usage counters are kept in memory and loaded from storage with
+    get_api_usage method (DB instance). Spent calls are saved to storage
+    by add_api_usage method every flush_interval seconds off the request
+    path and on close. Nothing is counted without limits.
+    """
+    def __init__(
+            self, daily_limit: int, monthly_limit: int,
+            storage: object = None, flush_interval: float = 5.0) -> None:
+        """
+        Initiate budget by limits (0 is unlimited) and storage.
+        Start saving thread if any limit is set.
+        """
+        self._limits = {'day': daily_limit, 'month': monthly_limit}
+        self._storage = storage
+        self._flush_interval = flush_interval
+        self._lock = Lock()
+        self._usage: dict[str, dict[str, int]] = {}
+        # calls not saved to storage by period and endpoint
+        self._pending: dict[tuple[str, str], int] = {}
+        self._stopped = Event()
+        self._thread = None
+        self.metrics = Metrics(f'{__name__}.ApiQuota')
+        if self.enabled and self._storage is not None and \
+                self._flush_interval > 0:
+            self._thread = Thread(
+                target=self._run, name='ApiQuota', daemon=True)
+            self._thread.start()
+
+    @property
+    def enabled(self) -> bool:
+        """Return True if any limit is set."""
+        return any(x > 0 for x in self._limits.values())
+
+    @staticmethod
+    def _periods() -> dict[str, str]:
+        """Return current period names by period type."""
+        today = date.today()
+        return {
+            'day': today.strftime('%Y-%m-%d'),
+            'month': today.strftime('%Y-%m')
+        }
+
+    def _period_usage(self, period: str) -> dict[str, int]:
+        """Return calls by endpoint in period. Load from storage once."""
+        usage = self._usage.get(period, None)
+        if usage is None:
+            usage = {}
+            if self._storage is not None:
+                usage = self._storage.get_api_usage(period)
+            self._usage[period] = usage
+        return usage
+
+    def spend(self, endpoint: str) -> bool:
+        """
+        Return status of spending one call of budget on endpoint.
+        False if daily or monthly limit is exceeded.
+        """
+        if not self.enabled:
+            return True
+        with self._lock:
+            periods = self._periods()
+            # forget past periods
+            self._usage = {
+                k: v for k, v in self._usage.items()
+                if k in periods.values()}
+            for period_type, period in periods.items():
+                limit = self._limits[period_type]
+                usage = self._period_usage(period)
+                if 0 < limit <= sum(usage.values()):
+                    self.metrics.incr(f'{period_type} exceeded')
+                    return False
+            for period in periods.values():
+                usage = self._period_usage(period)
+                usage[endpoint] = usage.get(endpoint, 0) + 1
+                key = (period, endpoint)
+                self._pending[key] = self._pending.get(key, 0) + 1
+            for period_type, period in periods.items():
+                self.metrics.gauge(
+                    period_type, sum(self._period_usage(period).values()))
+            return True
+
+    def flush(self) -> None:
+        """Save spent calls to storage. Failed ones are kept for retry."""
+        if self._storage is None:
+            return None
+        with self._lock:
+            pending = self._pending
+            self._pending = {}
+        failed = {}
+        for (period, endpoint), calls in pending.items():
+            if not self._storage.add_api_usage(period, endpoint, calls):
+                failed[(period, endpoint)] = calls
+        if len(failed) > 0:
+            self.metrics.incr('flush errors')
+            with self._lock:
+                for key, calls in failed.items():
+                    self._pending[key] = self._pending.get(key, 0) + calls
+
+    def _run(self) -> None:
+        """Save spent calls every flush_interval until stopped."""
+        while not self._stopped.wait(self._flush_interval):
+            self.flush()
+
+    def close(self) -> None:
+        """Stop saving thread and save spent calls last time."""
+        if self._stopped.is_set():
+            return None
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
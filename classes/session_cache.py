@@ -0,0 +1,67 @@
+from collections import OrderedDict
+from copy import copy
+from threading import Lock
+from time import monotonic
+
+from classes.metrics import Metrics
+from classes.user_session import UserSession
+
+
+class SessionCache:
+    """
+    Size-bounded LRU cache of active UserSession instances by chat_id.
+    Sessions idle for ttl seconds are expired.
+    Copies are kept and returned, so cached sessions change only by set.
+    """
+    def __init__(self, max_size: int, ttl: int) -> None:
+        """Initiate cache by max_size and idle ttl."""
+        self._max_size = max_size
+        self._ttl = ttl
+        self._items: OrderedDict[int, tuple[float, UserSession]] = \
+            OrderedDict()
+        self._lock = Lock()
+        self.metrics = Metrics(__name__)
+
+    def _count(self, counter: str) -> None:
+        """Count get result and update hit rate."""
+        self.metrics.incr(counter)
+        hits = self.metrics.get('hits')
+        self.metrics.gauge(
+            'hit rate', hits / (hits + self.metrics.get('misses')))
+
+    def get(self, chat_id: int) -> UserSession:
+        """Return active UserSession copy. None if not cached or idle."""
+        if self._max_size <= 0:
+            return None
+        now = monotonic()
+        with self._lock:
+            item = self._items.get(chat_id, None)
+            if item is not None:
+                used, session = item
+                if now - used < self._ttl:
+                    self._items[chat_id] = (now, session)
+                    self._items.move_to_end(chat_id)
+                    self._count('hits')
+                    return copy(session)
+                del self._items[chat_id]
+                self.metrics.incr('expired')
+        self._count('misses')
+        return None
+
+    def set(self, session: UserSession) -> None:
+        """Save active UserSession copy. Evict least recently used ones."""
+        if self._max_size <= 0:
+            return None
+        with self._lock:
+            self._items[session.chat_id] = (monotonic(), copy(session))
+            self._items.move_to_end(session.chat_id)
+            while len(self._items) > self._max_size:
+                self._items.popitem(last=False)
+                self.metrics.incr('evictions')
+            self.metrics.gauge('size', len(self._items))
+
+    def delete(self, chat_id: int) -> None:
+        """Remove UserSession by chat_id."""
+        with self._lock:
+            self._items.pop(chat_id, None)
+            self.metrics.gauge('size', len(self._items))
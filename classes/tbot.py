@@ -1,3 +1,4 @@
+from collections.abc import Iterable
 from telebot import TeleBot
 from telebot.types import InlineKeyboardMarkup, ReplyKeyboardMarkup
 from dataclasses import dataclass
@@ -22,7 +23,13 @@ class ReplyMessage:
 
 
 class TBot(TeleBot):
-    def send_reply_messages(self, replies: list[ReplyMessage]):
+    def send_reply_messages(
+            self, replies: Iterable[ReplyMessage]) -> ReplyMessage:
+        """
+        Send replies as soon as iterator yields them.
+        Return last sent ReplyMessage instance.
+        """
+        reply = None
         for reply in replies:
             if reply.media is not None:
                 # send media group
@@ -44,3 +51,4 @@ class TBot(TeleBot):
                     text=reply.text,
                     reply_markup=reply.markup
                 )
+        return reply
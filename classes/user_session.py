@@ -7,7 +7,11 @@ logger = get_logger(__name__)
 
 
 class UserSession:
-    """Class for keep user data in sessions."""
+    """
+    Class for keep user data in sessions.
+    Attributes are set in attrs order as steps of state machine,
+    step index points to the current step.
+    """
     attrs = {
         'command': str,
         'id': int,
@@ -23,6 +27,29 @@ class UserSession:
         'photos_show': bool,
         'photos_num': int
     }
+    steps = tuple(attrs) + ('complete',)
+    _step_index = {x: i for i, x in enumerate(steps)}
+    # steps filled by default values by command
+    skip_steps = {
+        '/lowprice': {
+            'price_min': 0.0,
+            'price_max': 0.0,
+            'distance_min': 0.0,
+            'distance_max': 0.0,
+        },
+        '/highprice': {
+            'price_min': 0.0,
+            'price_max': 0.0,
+            'distance_min': 0.0,
+            'distance_max': 0.0,
+        },
+    }
+    # default values by step index for commands with skipped steps
+    _plans: dict[str, tuple] = {}
+    for _command, _skips in skip_steps.items():
+        _plans[_command] = tuple(map(_skips.get, steps))
+    del _command, _skips
+    __slots__ = ('chat_id', '_step', '_changes') + tuple(attrs)
     id: int
     query_time: datetime
     command: str
@@ -39,8 +66,11 @@ class UserSession:
 
     def __init__(self, chat_id: int, **kwargs) -> None:
         self.chat_id = chat_id
+        self._step = 0
         if kwargs:
             self.set_attrs(kwargs)
+        # attributes set after loading
+        self._changes = {}
 
     @property
     def data(self) -> list:
@@ -52,19 +82,7 @@ class UserSession:
         """
         Return instance current step. 'complete' on fullfill.
         """
-        attrs = list(self.attrs.keys())
-        attrs.reverse()
-
-        for _attr in attrs:
-            try:
-                self.__getattribute__(_attr)
-                if _attr == attrs[0]:
-                    return 'complete'
-                return attrs[attrs.index(_attr) - 1]
-            except AttributeError:
-                pass
-        else:
-            return attrs[-1]
+        return self.steps[self._step]
 
     # validator
     def _validator(self, attr_name: str, attr_value: object) -> object:
@@ -107,20 +125,53 @@ class UserSession:
                     type(attr_value), attr_type, *e.args
                 )
 
+    def __copy__(self) -> 'UserSession':
+        """Return copy of instance without changes."""
+        session = UserSession.__new__(UserSession)
+        session.chat_id = self.chat_id
+        session._step = self._step
+        for attr_name in self.steps[:self._step]:
+            setattr(session, attr_name, getattr(self, attr_name))
+        session._changes = {}
+        return session
+
+    def pop_changes(self) -> dict:
+        """Return attributes set after loading or last call and clear them."""
+        changes = self._changes
+        self._changes = {}
+        return changes
+
     # setters
     def set_attrs(self, attr_dict: dict) -> dict:
         """
         Return dict with setted attributes.
+        Steps skipped by command are set with them.
         """
         success_attrs = {}
         for attr, value in attr_dict.items():
             try:
                 if self._set_attr(attr, value):
                     success_attrs[attr] = value
+                    success_attrs.update(self._skip_steps())
             except _UserSessionBaseError:
                 pass
+        if hasattr(self, '_changes'):
+            self._changes.update(success_attrs)
         return success_attrs
 
+    def _skip_steps(self) -> dict:
+        """Return dict with default values of steps skipped by command."""
+        plan = self._plans.get(self.command, None)
+        skipped_attrs = {}
+        if plan is None:
+            return skipped_attrs
+        while plan[self._step] is not None:
+            attr_name = self.steps[self._step]
+            setattr(self, attr_name, plan[self._step])
+            skipped_attrs[attr_name] = plan[self._step]
+            self._step += 1
+        return skipped_attrs
+
     def _set_attr(self, attr_name: str, attr_value: object) -> bool:
         """
         Return attribute setter status.
@@ -130,35 +181,30 @@ class UserSession:
         if attr_value is None:
             raise UserSessionValueError(
                 f'Invalid value [{attr_value}] for attribute [{attr_name}].')
-        try:
-            self.__getattribute__(attr_name)
+        step = self._step_index.get(attr_name, None)
+        if step is not None and step < self._step:
             return None
-        except AttributeError:
-            # check order
-            if self.current_step != attr_name:
-                raise UserSessionAttributeError(
-                    f'Attribute [{attr_name}] setting order error.')
-            # validate types
+        # check order
+        if step != self._step:
+            raise UserSessionAttributeError(
+                f'Attribute [{attr_name}] setting order error.')
+        # validate types
+        try:
+            attr_value = self._validator(attr_name, attr_value)
+        except (UserSessionAttributeError, UserSessionValueError):
+            return False
+        # Set attribute value to instance
+        setattr(self, attr_name, attr_value)
+        # checker
+        checker = self._checkers.get(attr_name, None)
+        if checker is not None:
             try:
-                attr_value = self._validator(attr_name, attr_value)
-            except (UserSessionAttributeError, UserSessionValueError):
+                checker(self)
+            except (UserSessionValueError, UserSessionAttributeError):
+                delattr(self, attr_name)
                 return False
-            # Set attribute value to instance
-            self.__setattr__(attr_name, attr_value)
-            # checker
-            try:
-                # Class have checker
-                checker = self.__getattribute__(f'_check_{attr_name}')
-                try:
-                    if callable(checker):
-                        checker()
-                    return True
-                except (UserSessionValueError, UserSessionAttributeError):
-                    self.__delattr__(attr_name)
-                    return False
-            except AttributeError:
-                # No checker
-                return True
+        self._step += 1
+        return True
 
     # checkers
     def _check_command(self) -> None:
@@ -300,6 +346,19 @@ class UserSession:
         except AttributeError:
             raise UserSessionAttributeError(f'Attribute [{attr}] not set.')
 
+    # checkers by attribute name
+    _checkers = {
+        'command': _check_command,
+        'check_in': _check_check_in,
+        'check_out': _check_check_out,
+        'price_min': _check_price_min,
+        'price_max': _check_price_max,
+        'distance_min': _check_distance_min,
+        'distance_max': _check_distance_max,
+        'results_num': _check_results_num,
+        'photos_num': _check_photos_num
+    }
+
 
 class _UserSessionBaseError(Exception):
     """Basic exception for UserSession class with logging."""
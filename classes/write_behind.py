@@ -0,0 +1,157 @@
+from queue import Empty, Full, Queue
+from threading import Condition, Thread
+from time import monotonic
+
+from app.app_logger import get_logger
+from classes.database import DB, UnitOfWork
+from classes.metrics import Metrics
+
+
+# initiate logger
+logger = get_logger(__name__)
+
+
+class WriteBehindQueue:
+    """
+    Bounded queue of UnitOfWork instances saved by writer thread.
+    Queued units are coalesced into one transaction up to batch_size.
+    Caller waits up to put_timeout for free place in full queue
+    and commits unit itself after it, flush waits up to flush_timeout.
+    Units are counted by chat_id to flush units of one chat only.
+    """
+    def __init__(
+            self, db: DB, max_size: int, batch_size: int,
+            put_timeout: float = 1.0, flush_timeout: float = 5.0) -> None:
+        """Initiate queue and start writer thread."""
+        self._db = db
+        self._batch_size = max(batch_size, 1)
+        self._put_timeout = put_timeout
+        self._flush_timeout = flush_timeout
+        self._queue: Queue[tuple[float, UnitOfWork, int]] = Queue(max_size)
+        # queued units by chat_id
+        self._chats: dict[int, int] = {}
+        self._chats_cond = Condition()
+        self._closed = False
+        self.metrics = Metrics(__name__)
+        self._thread = Thread(
+            target=self._run, name='WriteBehindQueue', daemon=True)
+        self._thread.start()
+
+    def put(self, uow: UnitOfWork, chat_id: int = None) -> bool:
+        """
+        Return status of queuing unit of work of chat_id.
+        Unit is committed in caller thread if queue is full or closed.
+        """
+        if not self._closed:
+            self._count_chat(chat_id, 1)
+            try:
+                self._queue.put(
+                    (monotonic(), uow, chat_id), timeout=self._put_timeout)
+                self.metrics.gauge('depth', self._queue.qsize())
+                return True
+            except Full:
+                self._count_chat(chat_id, -1)
+                self.metrics.incr('overflow')
+                logger.warning('WriteBehindQueue is full.')
+        if not uow.commit():
+            self.metrics.incr('errors')
+        return False
+
+    def _count_chat(self, chat_id: int, value: int) -> None:
+        """Change number of queued units of chat_id by value."""
+        if chat_id is None:
+            return None
+        with self._chats_cond:
+            count = self._chats.get(chat_id, 0) + value
+            if count > 0:
+                self._chats[chat_id] = count
+            else:
+                self._chats.pop(chat_id, None)
+                self._chats_cond.notify_all()
+
+    def _get_batch(
+            self, wait: bool) -> list[tuple[float, UnitOfWork, int]]:
+        """Return up to batch_size queued items. Wait for the first one."""
+        batch = []
+        try:
+            if wait:
+                batch.append(self._queue.get())
+            while len(batch) < self._batch_size:
+                batch.append(self._queue.get_nowait())
+        except Empty:
+            pass
+        return batch
+
+    def _commit(self, batch: list[tuple[float, UnitOfWork, int]]) -> None:
+        """
+        Commit units of batch in one transaction.
+        Commit them one by one if transaction failed.
+        """
+        uow = self._db.unit_of_work()
+        for _, batch_uow, _ in batch:
+            uow.extend(batch_uow)
+        if not uow.commit():
+            logger.error(f'WriteBehindQueue batch error [{len(batch)}].')
+            for _, batch_uow, _ in batch:
+                if not batch_uow.commit():
+                    self.metrics.incr('errors')
+        now = monotonic()
+        for queued, _, _ in batch:
+            self.metrics.observe('lag', now - queued)
+        self.metrics.observe('batch', len(batch))
+        self.metrics.incr('committed', len(batch))
+
+    def _run(self) -> None:
+        """
+        Save queued units until None is got and queue is empty.
+        Batch errors are logged and do not stop writer thread.
+        """
+        stop = False
+        while True:
+            batch = self._get_batch(wait=not stop)
+            if len(batch) == 0:
+                break
+            units = [x for x in batch if x is not None]
+            stop = stop or len(units) < len(batch)
+            try:
+                if len(units) > 0:
+                    self._commit(units)
+            except Exception:
+                logger.exception(
+                    f'WriteBehindQueue batch lost [{len(units)}].')
+                self.metrics.incr('errors', len(units))
+            finally:
+                self.metrics.gauge('depth', self._queue.qsize())
+                for _, _, chat_id in units:
+                    self._count_chat(chat_id, -1)
+                for _ in batch:
+                    self._queue.task_done()
+
+    def flush(self, timeout: float = None, chat_id: int = None) -> bool:
+        """
+        Return True if all queued units (of chat_id if it is set)
+        are saved in timeout. flush_timeout is used if timeout is None.
+        """
+        if timeout is None:
+            timeout = self._flush_timeout
+        if chat_id is not None:
+            with self._chats_cond:
+                done = self._chats_cond.wait_for(
+                    lambda: chat_id not in self._chats, timeout)
+        else:
+            with self._queue.all_tasks_done:
+                done = self._queue.all_tasks_done.wait_for(
+                    lambda: self._queue.unfinished_tasks == 0, timeout)
+        if not done:
+            self.metrics.incr('flush timeouts')
+            logger.warning('WriteBehindQueue flush timeout.')
+        return done
+
+    def close(self, timeout: float = None) -> None:
+        """Save queued units and stop writer thread."""
+        if self._closed:
+            return None
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout)
+        logger.debug(f'WriteBehindQueue closed {self.metrics}.')
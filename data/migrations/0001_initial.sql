@@ -1,6 +1,6 @@
 PRAGMA foreing_keys=on;
 
-CREATE TABLE "sessions"(
+CREATE TABLE IF NOT EXISTS "sessions"(
     "id" INTEGER NOT NULL,
     "chat_id" INTEGER NOT NULL,
     "query_time" TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -22,7 +22,7 @@ CREATE TABLE "sessions"(
         ON DELETE SET NULL
 );
 
-CREATE TABLE "locations"(
+CREATE TABLE IF NOT EXISTS "locations"(
     "destination_id" INTEGER NOT NULL,
     "geo_id" INTEGER NOT NULL,
     "caption" VARCHAR(255) NOT NULL UNIQUE,
@@ -31,7 +31,7 @@ CREATE TABLE "locations"(
     PRIMARY KEY ("destination_id")
 );
 
-CREATE TABLE "hotels"(
+CREATE TABLE IF NOT EXISTS "hotels"(
     "id" INTEGER NOT NULL,
     "name" VARCHAR(50) NOT NULL,
     "address" VARCHAR(255) NOT NULL,
@@ -40,7 +40,7 @@ CREATE TABLE "hotels"(
     PRIMARY KEY("id")
 );
 
-CREATE TABLE "photos"(
+CREATE TABLE IF NOT EXISTS "photos"(
     "id" INTEGER NOT NULL,
     "hotel_id" INTEGER NOT NULL,
     "url" TEXT NOT NULL,
@@ -50,7 +50,7 @@ CREATE TABLE "photos"(
         ON DELETE CASCADE
 );
 
-CREATE TABLE "results"(
+CREATE TABLE IF NOT EXISTS "results"(
     "id" INTEGER NOT NULL,
     "session_id" INTEGER NOT NULL,
     "hotel_id" INTEGER NOT NULL,
@@ -63,4 +63,4 @@ CREATE TABLE "results"(
     FOREIGN KEY("hotel_id") REFERENCES "hotels"("id") 
         ON UPDATE CASCADE 
         ON DELETE CASCADE
-)
+);
@@ -0,0 +1,6 @@
+CREATE TABLE IF NOT EXISTS "api_usage"(
+    "period" VARCHAR(10) NOT NULL,
+    "endpoint" VARCHAR(50) NOT NULL,
+    "calls" INTEGER DEFAULT 0,
+    PRIMARY KEY("period", "endpoint")
+);
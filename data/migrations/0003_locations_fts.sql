@@ -0,0 +1,9 @@
+CREATE VIRTUAL TABLE IF NOT EXISTS "locations_fts" USING fts5(
+    "caption",
+    "name_lower",
+    content="locations",
+    content_rowid="destination_id",
+    tokenize="trigram"
+);
+
+INSERT INTO "locations_fts"("locations_fts") VALUES('rebuild');
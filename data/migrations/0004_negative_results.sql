@@ -0,0 +1,6 @@
+CREATE TABLE IF NOT EXISTS "negative_results"(
+    "kind" VARCHAR(20) NOT NULL,
+    "key" TEXT NOT NULL,
+    "expires" REAL NOT NULL,
+    PRIMARY KEY("kind", "key")
+);
@@ -0,0 +1,11 @@
+CREATE INDEX IF NOT EXISTS "sessions_chat_id_complete"
+    ON "sessions"("chat_id", "complete");
+
+CREATE INDEX IF NOT EXISTS "results_session_id"
+    ON "results"("session_id");
+
+CREATE INDEX IF NOT EXISTS "photos_hotel_id"
+    ON "photos"("hotel_id");
+
+CREATE INDEX IF NOT EXISTS "locations_name_lower"
+    ON "locations"("name_lower");
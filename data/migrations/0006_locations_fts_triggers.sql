@@ -0,0 +1,23 @@
+-- keep external content full-text index in sync with locations
+CREATE TRIGGER IF NOT EXISTS "locations_fts_insert" AFTER INSERT ON "locations"
+BEGIN
+    INSERT INTO "locations_fts"("rowid", "caption", "name_lower")
+        VALUES (new."destination_id", new."caption", new."name_lower");
+END;
+
+CREATE TRIGGER IF NOT EXISTS "locations_fts_delete" AFTER DELETE ON "locations"
+BEGIN
+    INSERT INTO "locations_fts"("locations_fts", "rowid", "caption", "name_lower")
+        VALUES ('delete', old."destination_id", old."caption", old."name_lower");
+END;
+
+CREATE TRIGGER IF NOT EXISTS "locations_fts_update" AFTER UPDATE ON "locations"
+BEGIN
+    INSERT INTO "locations_fts"("locations_fts", "rowid", "caption", "name_lower")
+        VALUES ('delete', old."destination_id", old."caption", old."name_lower");
+    INSERT INTO "locations_fts"("rowid", "caption", "name_lower")
+        VALUES (new."destination_id", new."caption", new."name_lower");
+END;
+
+-- restore rows missed by separate index inserts
+INSERT INTO "locations_fts"("locations_fts") VALUES('rebuild');
@@ -0,0 +1,2 @@
+CREATE INDEX IF NOT EXISTS "negative_results_expires"
+    ON "negative_results"("expires");
@@ -1,3 +1,4 @@
+import signal
 from os import getcwd, path
 from dotenv import load_dotenv
 
@@ -20,6 +21,14 @@ def clear_debug_log() -> None:
             pass
 
 
+def stop_on_sigterm(signum: int, frame: object) -> None:
+    """
+    Stop bot polling as by Ctrl+C. Application exits normally and
+    exit handlers run (Docker stops PID 1 by SIGTERM).
+    """
+    raise KeyboardInterrupt
+
+
 if __name__ == '__main__':
     if load_env(fn='.env', override=True):
         clear_debug_log()
@@ -30,5 +39,10 @@ if __name__ == '__main__':
         # initiate logger
         logger = get_logger(__name__)
 
+        signal.signal(signal.SIGTERM, stop_on_sigterm)
         logger.info('Application starts...')
-        bot.polling(non_stop=True, interval=0)
+        try:
+            bot.polling(non_stop=True, interval=0)
+        except KeyboardInterrupt:
+            pass
+        logger.info('Application stops...')
@@ -0,0 +1,19 @@
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+
+
+# required settings for importing app modules without .env
+if 'DATABASE_ENGINE' not in os.environ:
+    TMP_DIR = tempfile.mkdtemp(prefix='tests_')
+    atexit.register(shutil.rmtree, TMP_DIR, ignore_errors=True)
+    os.environ['DATABASE_ENGINE'] = os.path.join(TMP_DIR, 'test.db')
+os.environ.setdefault('BOT_TOKEN', '1:test')
+os.environ.setdefault('API_HOST', 'localhost')
+os.environ.setdefault('API_KEY', 'test')
+# migrations and logs paths are relative to repository root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
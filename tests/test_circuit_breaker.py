@@ -0,0 +1,65 @@
+from time import sleep
+
+from classes.circuit_breaker import CircuitBreaker
+
+
+RESET = 0.05
+
+
+def test_opens_after_threshold_failures():
+    breaker = CircuitBreaker(2, RESET)
+    breaker.failure()
+    assert breaker.allow()
+    breaker.failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_success_resets_failures():
+    breaker = CircuitBreaker(2, RESET)
+    breaker.failure()
+    breaker.success()
+    breaker.failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_one_probe_closes_breaker():
+    breaker = CircuitBreaker(1, RESET)
+    breaker.failure()
+    sleep(RESET)
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # one probe at a time
+    assert not breaker.allow()
+    breaker.success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_failed_probe_opens_breaker():
+    breaker = CircuitBreaker(3, RESET)
+    for _ in range(3):
+        breaker.failure()
+    sleep(RESET)
+    assert breaker.allow()
+    breaker.failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_zero_threshold_disables_breaker():
+    breaker = CircuitBreaker(0, RESET)
+    for _ in range(10):
+        breaker.failure()
+    assert breaker.allow()
+
+
+def test_released_probe_is_allowed_again():
+    breaker = CircuitBreaker(1, RESET)
+    breaker.failure()
+    sleep(RESET)
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
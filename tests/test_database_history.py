@@ -0,0 +1,70 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from classes.basic import Hotel, Location
+from classes.database import DB
+
+
+CHAT_ID = 1
+CHECK_IN = date.today() + timedelta(days=3)
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DB(str(tmp_path / 'test.db'))
+    db.add_location(Location(1, 1, 'Омск, Россия', 'Омск'))
+    for id in range(1, 4):
+        db.add_hotel(Hotel(id, f'H{id}', 'Street, 1', 3, 1.5))
+    # sessions 1..4: 4 is not complete, 2 has no results and
+    # unknown location, 5 is of other chat
+    sessions = []
+    for id, chat_id, location_id, complete in (
+            (1, CHAT_ID, 1, True), (2, CHAT_ID, 2, True),
+            (3, CHAT_ID, 1, True), (4, CHAT_ID, 1, False),
+            (5, CHAT_ID + 1, 1, True)):
+        sessions.append([
+            id, chat_id, datetime(2026, 1, 1) + timedelta(minutes=id),
+            '/lowprice', location_id, CHECK_IN, CHECK_IN + timedelta(days=1),
+            0.0, 0.0, 0.0, 0.0, 3, False, 0, complete])
+    results = [
+        [1, 1, 'url', 1000.0], [1, 2, 'url', 1100.0],
+        [3, 3, 'url', 1200.0], [3, 1, 'url', 1300.0], [3, 2, 'url', 1400.0],
+        [4, 1, 'url', 1000.0], [5, 1, 'url', 1000.0]]
+    db._update_batch([
+        ("INSERT INTO sessions(id, chat_id, query_time, command,"
+         " location_id, check_in, check_out, price_min, price_max,"
+         " distance_min, distance_max, results_num, photos_show,"
+         " photos_num, complete)"
+         " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", sessions),
+        ("INSERT INTO results(session_id, hotel_id, url, price)"
+         " VALUES (?, ?, ?, ?)", results),
+    ])
+    return db
+
+
+def _ids(history) -> list[tuple[int, int, list[int]]]:
+    return [
+        (session.id, location and location.destination_id,
+         [hotel.id for hotel, _ in results])
+        for session, location, results in history]
+
+
+def test_results_are_grouped_by_session(db):
+    history = db.get_history(CHAT_ID)
+    assert _ids(history) == [(3, 1, [3, 1, 2]), (2, None, []), (1, 1, [1, 2])]
+    session, _, results = history[0]
+    assert session.current_step == 'complete'
+    assert [x.price for _, x in results] == [1200.0, 1300.0, 1400.0]
+    assert all(x.session_id == 3 for _, x in results)
+
+
+def test_limit_and_offset(db):
+    assert _ids(db.get_history(CHAT_ID, 2)) == [
+        (3, 1, [3, 1, 2]), (2, None, [])]
+    assert _ids(db.get_history(CHAT_ID, 2, 2)) == [(1, 1, [1, 2])]
+    assert db.get_history(CHAT_ID, 2, 4) == []
+
+
+def test_empty_history(db):
+    assert db.get_history(CHAT_ID + 2) == []
@@ -0,0 +1,21 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from classes.basic import Hotel
+from classes.database import DB
+
+
+def test_threads_use_own_connections_in_wal_mode(tmp_path):
+    db = DB(str(tmp_path / 'test.db'))
+    with ThreadPoolExecutor(1) as executor:
+        conn = executor.submit(lambda: db._conn).result()
+    assert conn is not db._conn
+    assert db._conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+
+
+def test_reads_do_not_wait_for_writer(tmp_path):
+    db = DB(str(tmp_path / 'test.db'))
+    db.add_hotel(Hotel(1, 'Hotel', 'Street, 1', 3, 1.5))
+    with db._write_lock, ThreadPoolExecutor(1) as executor:
+        # writer lock is held by this thread during read of other one
+        hotel = executor.submit(db.get_hotel_byid, 1).result(timeout=1)
+    assert hotel.name == 'Hotel'
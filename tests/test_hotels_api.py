@@ -0,0 +1,142 @@
+from datetime import date, datetime, timedelta
+from threading import Event, Lock, current_thread
+from time import sleep
+
+import pytest
+
+import classes.hotels_api as hotels_api
+from classes.hotels_api import HotelsApi
+from classes.user_session import UserSession
+
+
+PAGE_SIZE = HotelsApi.PAGE_SIZE_MAX
+TOTAL_PAGES = 20
+
+
+def _hotel_data(page: int, index: int, price: float) -> dict:
+    """Return search result data of hotel sorted by distance."""
+    return {
+        'id': page * 100 + index,
+        'name': f'H{page * 100 + index}',
+        'starRating': 3,
+        'address': {
+            'streetAddress': 's', 'extendedAddress': '', 'locality': 'l',
+            'region': 'r', 'countryName': 'c'},
+        'landmarks': [{
+            'label': 'City center',
+            'distance': f'{(page - 1) * PAGE_SIZE + index:.1f} km'}],
+        'ratePlan': {'price': {'exactCurrent': price}}
+    }
+
+
+class _FakePages:
+    """Search pages of TOTAL_PAGES with the cheapest hotel on cheap_page."""
+    def __init__(self, cheap_page: int) -> None:
+        self.cheap_page = cheap_page
+        self.requested = []
+        self._lock = Lock()
+        self._active = 0
+        self.max_active = 0
+
+    def __call__(self, url: str, params: dict, page: int) -> tuple[int, list]:
+        with self._lock:
+            self.requested.append(page)
+            self._active += 1
+            self.max_active = max(self.max_active, self._active)
+        sleep(0.01)
+        with self._lock:
+            self._active -= 1
+        results = [
+            _hotel_data(page, i, 1400.0 + i) for i in range(PAGE_SIZE)]
+        if page == self.cheap_page:
+            results[0] = _hotel_data(page, 0, 1010.0)
+        return TOTAL_PAGES * PAGE_SIZE, results
+
+
+def _session(distance_min: float = 0.0) -> UserSession:
+    check_in = date.today() + timedelta(days=3)
+    return UserSession(
+        1, command='/bestdeal', id=1, query_time=datetime(2026, 1, 1),
+        location_id=1, check_in=check_in,
+        check_out=check_in + timedelta(days=1),
+        price_min=1000.0, price_max=1500.0,
+        distance_min=distance_min, distance_max=10000.0, results_num=3)
+
+
+@pytest.fixture
+def api(monkeypatch):
+    monkeypatch.setattr(hotels_api, 'API_MAX_WORKERS', 3)
+    monkeypatch.setattr(hotels_api, 'BESTDEAL_RANK', 'price')
+    return HotelsApi()
+
+
+def test_bestdeal_max_pages_merges_every_requested_page(api, monkeypatch):
+    monkeypatch.setattr(hotels_api, 'BESTDEAL_MAX_PAGES', 10)
+    api._get_search_page = pages = _FakePages(cheap_page=10)
+    results = api.get_search_results(_session())
+    assert sorted(pages.requested) == list(range(1, 11))
+    assert results[0].id == 1000
+    assert results[0].price == 1010.0
+
+
+def test_bestdeal_unlimited_pages_are_parallel(api, monkeypatch):
+    monkeypatch.setattr(hotels_api, 'BESTDEAL_MAX_PAGES', 0)
+    api._get_search_page = pages = _FakePages(cheap_page=TOTAL_PAGES)
+    results = api.get_search_results(_session())
+    assert sorted(pages.requested) == list(range(1, TOTAL_PAGES + 1))
+    assert pages.max_active > 1
+    assert results[0].price == 1010.0
+
+
+def test_bestdeal_skipped_pages_do_not_count(api, monkeypatch):
+    monkeypatch.setattr(hotels_api, 'BESTDEAL_MAX_PAGES', 3)
+    api._get_search_page = pages = _FakePages(cheap_page=11)
+    # the first page not closer than distance_min is page 9
+    results = api.get_search_results(_session(8.0 * PAGE_SIZE))
+    assert results[0].price == 1010.0
+    # pages 9, 10 and 11 are merged, probes are not counted
+    assert {9, 10, 11} <= set(pages.requested)
+    assert not {13, 14, 15} & set(pages.requested)
+
+
+def test_bestdeal_results_are_yielded_when_search_is_over(api, monkeypatch):
+    monkeypatch.setattr(hotels_api, 'API_MAX_WORKERS', 1)
+    monkeypatch.setattr(hotels_api, 'BESTDEAL_MAX_PAGES', 2)
+    api._get_search_page = pages = _FakePages(cheap_page=2)
+    results = api.iter_search_results(_session())
+    assert next(results).price == 1010.0
+    # no page after the last merged one is waited for
+    assert pages.requested == [1, 2]
+
+
+def test_cancelled_search_requests_no_more_pages(api, monkeypatch):
+    monkeypatch.setattr(hotels_api, 'API_MAX_WORKERS', 1)
+    monkeypatch.setattr(hotels_api, 'BESTDEAL_MAX_PAGES', 0)
+    pages = _FakePages(cheap_page=TOTAL_PAGES)
+    cancelled = Event()
+
+    def get_search_page(url: str, params: dict, page: int):
+        if page == 3:
+            cancelled.set()
+        return pages(url, params, page)
+
+    api._get_search_page = get_search_page
+    assert list(api.iter_search_results(_session(), cancelled)) == []
+    assert pages.requested == [1, 2, 3]
+
+
+def test_searches_share_page_threads(api, monkeypatch):
+    monkeypatch.setattr(hotels_api, 'BESTDEAL_MAX_PAGES', 4)
+    threads = set()
+    pages = _FakePages(cheap_page=TOTAL_PAGES)
+
+    def get_search_page(url: str, params: dict, page: int):
+        if page > 1:
+            threads.add(current_thread())
+        return pages(url, params, page)
+
+    api._get_search_page = get_search_page
+    for _ in range(5):
+        api.get_search_results(_session())
+    assert len(threads) <= hotels_api.API_POOL_SIZE
+    assert all(x.name.startswith('HotelsApi') for x in threads)
@@ -0,0 +1,53 @@
+from classes.basic import Location
+from classes.location_index import LocationIndex
+
+
+def _location(destination_id: int, name: str) -> Location:
+    return Location(destination_id, destination_id, f'{name}, Россия', name)
+
+
+INDEX_LOCATIONS = [
+    _location(1, 'Москва'),
+    _location(2, 'Омск'),
+    _location(3, 'Санкт-Петербург'),
+    _location(4, 'Екатеринбург'),
+]
+
+
+def _ids(locations: list[Location]) -> list[int]:
+    return [x.destination_id for x in locations]
+
+
+def test_exact_and_transliterated_names():
+    index = LocationIndex(INDEX_LOCATIONS)
+    assert _ids(index.search('москва')) == [1]
+    assert _ids(index.search('Moskva')) == [1]
+    assert _ids(index.search('Sankt-Peterburg', fuzzy=False)) == [3]
+
+
+def test_misspelled_names():
+    index = LocationIndex(INDEX_LOCATIONS)
+    # substitution and transposition
+    assert _ids(index.search('Масква')) == [1]
+    assert _ids(index.search('Мосвка')) == [1]
+    assert _ids(index.search('Екатеринбруг')) == [4]
+
+
+def test_fuzzy_matches_are_not_exact():
+    index = LocationIndex(INDEX_LOCATIONS)
+    # Томск is one edit away from Омск
+    assert _ids(index.search('Томск')) == [2]
+    assert index.search('Томск', fuzzy=False) == []
+
+
+def test_short_names_are_not_fuzzy():
+    index = LocationIndex(INDEX_LOCATIONS)
+    assert index.search('Омс') == []
+
+
+def test_add_and_limit():
+    index = LocationIndex([])
+    index.add(_location(5, 'Томск'))
+    index.add(_location(6, 'Томск'))
+    assert _ids(index.search('томск')) == [5, 6]
+    assert _ids(index.search('томск', limit=1)) == [5]
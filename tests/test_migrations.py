@@ -0,0 +1,87 @@
+import shutil
+import sqlite3
+from os import listdir, path
+
+import pytest
+
+from classes.basic import Location
+from classes.database import DB
+
+
+MIGRATIONS = sorted(listdir(DB._migrations_dir))
+
+
+def _version(engine: str) -> int:
+    with sqlite3.connect(engine) as conn:
+        return conn.execute(
+            'SELECT MAX(version) FROM schema_version').fetchone()[0]
+
+
+def _copy_migrations(tmp_path, count: int) -> str:
+    dir_path = tmp_path / 'migrations'
+    dir_path.mkdir()
+    for fn in MIGRATIONS[:count]:
+        shutil.copy(path.join(DB._migrations_dir, fn), dir_path)
+    return str(dir_path)
+
+
+def test_new_database_is_migrated_to_last_version(tmp_path):
+    engine = str(tmp_path / 'test.db')
+    DB(engine)
+    assert _version(engine) == int(MIGRATIONS[-1].partition('_')[0])
+
+
+def test_failed_migration_keeps_previous_version(tmp_path, monkeypatch):
+    engine = str(tmp_path / 'test.db')
+    dir_path = _copy_migrations(tmp_path, 2)
+    with open(path.join(dir_path, '0003_bad.sql'), 'w') as f:
+        f.write('CREATE TABLE "bad"("id" INTEGER);\nSELECT * FROM missing;\n')
+    monkeypatch.setattr(DB, '_migrations_dir', dir_path)
+    # DBConnectionError stops application
+    with pytest.raises(SystemExit):
+        DB(engine)
+    assert _version(engine) == 2
+    with sqlite3.connect(engine) as conn:
+        assert conn.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE name = 'bad'"
+        ).fetchone()[0] == 0
+
+
+def test_locations_index_is_kept_in_sync(tmp_path):
+    db = DB(str(tmp_path / 'test.db'))
+    db.add_location(Location(1, 1, 'Москва, Россия', 'Москва'))
+    assert [x.destination_id for x in db.get_locations_byname('москва')] == [1]
+    assert [x.destination_id for x in db.get_locations_byname('Моск')] == [1]
+
+
+def test_missed_index_rows_are_restored(tmp_path, monkeypatch):
+    engine = str(tmp_path / 'test.db')
+    monkeypatch.setattr(DB, '_migrations_dir', _copy_migrations(tmp_path, 5))
+    DB(engine)
+    # location saved without full-text index row
+    with sqlite3.connect(engine) as conn:
+        conn.execute(
+            'INSERT INTO locations'
+            '(destination_id, geo_id, caption, name, name_lower)'
+            " VALUES (1, 1, 'Омск, Россия', 'Омск', 'омск')")
+    monkeypatch.undo()
+    db = DB(engine)
+    assert [x.destination_id for x in db.get_locations_byname('омск')] == [1]
+
+
+@pytest.mark.parametrize('q, v, index', [
+    ('SELECT id FROM sessions WHERE chat_id = ? AND complete IS FALSE',
+     [1], 'sessions_chat_id_complete'),
+    ('SELECT id FROM results WHERE session_id = ?', [1], 'results_session_id'),
+    ('SELECT id FROM photos WHERE hotel_id = ? ORDER BY id', [1],
+     'photos_hotel_id'),
+    ('SELECT destination_id FROM locations WHERE name_lower = ?', ['омск'],
+     'locations_name_lower'),
+    ('DELETE FROM negative_results WHERE expires <= ?', [0.0],
+     'negative_results_expires'),
+])
+def test_hot_queries_use_indexes(tmp_path, q, v, index):
+    db = DB(str(tmp_path / 'test.db'))
+    plan = ' '.join(
+        row[3] for row in db._conn.execute(f'EXPLAIN QUERY PLAN {q}', v))
+    assert f'INDEX {index}' in plan
@@ -0,0 +1,47 @@
+from types import SimpleNamespace
+
+import pytest
+
+from classes.ranker import TopKRanker
+
+
+def _result(price: float, distance: float = 1.0, star_rating: int = 3):
+    return SimpleNamespace(
+        price=price, distance=distance, star_rating=star_rating)
+
+
+def test_keeps_k_best_by_price():
+    ranker = TopKRanker(2)
+    kept = [ranker.push(_result(x)) for x in (5.0, 3.0, 4.0, 1.0, 9.0)]
+    assert kept == [True, True, True, True, False]
+    assert [x.price for x in ranker.results] == [1.0, 3.0]
+
+
+def test_equal_ranks_keep_first_results():
+    ranker = TopKRanker(2, 'star_rating')
+    first, second, third = (_result(x, star_rating=4) for x in (1, 2, 3))
+    for result in (first, second, third):
+        ranker.push(result)
+    assert ranker.results == [first, second]
+
+
+def test_score_key_weights():
+    ranker = TopKRanker(
+        1, 'score', price_range=(0.0, 100.0),
+        distance_range=(0.0, 10.0), weights=(0.0, 1.0, 0.0))
+    ranker.push(_result(10.0, distance=5.0))
+    ranker.push(_result(90.0, distance=1.0))
+    assert [x.price for x in ranker.results] == [90.0]
+
+
+def test_can_improve_by_distance():
+    ranker = TopKRanker(1, 'distance')
+    assert ranker.can_improve(10.0)
+    ranker.push(_result(1.0, distance=2.0))
+    assert ranker.can_improve(1.0)
+    assert not ranker.can_improve(2.0)
+
+
+def test_invalid_key():
+    with pytest.raises(ValueError):
+        TopKRanker(1, 'rating')
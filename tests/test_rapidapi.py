@@ -0,0 +1,60 @@
+from time import sleep
+from types import SimpleNamespace
+
+import pytest
+
+import classes.rapidapi as rapidapi
+from classes.circuit_breaker import CircuitBreaker
+from classes.rapidapi import Api
+
+
+RESET = 0.05
+
+
+class _Session:
+    def __init__(self, status_codes: list[int]) -> None:
+        self.status_codes = status_codes
+
+    def request(self, **kwargs) -> SimpleNamespace:
+        status_code = self.status_codes.pop(0)
+        return SimpleNamespace(
+            ok=status_code < 400, status_code=status_code, text='{}')
+
+
+@pytest.fixture
+def api(monkeypatch):
+    monkeypatch.setattr(rapidapi, 'API_RETRIES', 0)
+    api = Api()
+    api._cache = None
+    api._breaker = CircuitBreaker(1, RESET)
+    return api
+
+
+def _open(api: Api, monkeypatch, status_codes: list[int]) -> None:
+    monkeypatch.setattr(
+        Api, '_get_session', classmethod(lambda cls: _Session(status_codes)))
+    with pytest.raises(Api.ApiRequestError):
+        api._request(f'{api._base_url}/search', {}, 'GET')
+    assert api._breaker.state == CircuitBreaker.OPEN
+    sleep(RESET)
+
+
+def test_probe_with_429_response_is_released(api, monkeypatch):
+    _open(api, monkeypatch, [500, 429, 200])
+    with pytest.raises(Api.ApiRequestError):
+        api._request(f'{api._base_url}/search', {}, 'GET')
+    assert api._request(f'{api._base_url}/search', {}, 'GET') == {}
+    assert api._breaker.state == CircuitBreaker.CLOSED
+
+
+def test_probe_stopped_by_quota_is_released(api, monkeypatch):
+    _open(api, monkeypatch, [500, 200])
+    spends = [False]
+
+    def spend(endpoint: str) -> bool:
+        return spends.pop(0) if spends else True
+
+    monkeypatch.setattr(api._quota, 'spend', spend)
+    with pytest.raises(Api.ApiQuotaError):
+        api._request(f'{api._base_url}/search', {}, 'GET')
+    assert api._request(f'{api._base_url}/search', {}, 'GET') == {}
@@ -0,0 +1,76 @@
+from classes.rate_limiter import ApiQuota, RateLimiter, TokenBucket
+
+
+def test_token_bucket_burst():
+    bucket = TokenBucket(rate=1, capacity=3)
+    assert [bucket.acquire(timeout=0) for _ in range(4)] == [
+        True, True, True, False]
+
+
+def test_token_bucket_zero_rate_is_unlimited():
+    bucket = TokenBucket(rate=0, capacity=1)
+    assert all(bucket.acquire(timeout=0) for _ in range(10))
+
+
+def test_token_bucket_reserve():
+    bucket = TokenBucket(rate=1, capacity=3)
+    # two tokens are left for requests without reserve
+    assert bucket.acquire(reserve=2, timeout=0)
+    assert not bucket.acquire(reserve=2, timeout=0)
+    assert bucket.acquire(timeout=0)
+
+
+def test_rate_limiter_endpoint_rate():
+    limiter = RateLimiter(
+        rate=0, burst=2, reserve=0, endpoint_rates={'photos': 1})
+    assert limiter.acquire('photos', timeout=0)
+    assert limiter.acquire('photos', timeout=0)
+    assert not limiter.acquire('photos', timeout=0)
+    assert limiter.acquire('search', timeout=0)
+
+
+def test_api_quota_daily_limit():
+    quota = ApiQuota(daily_limit=2, monthly_limit=0)
+    assert quota.spend('search')
+    assert quota.spend('photos')
+    assert not quota.spend('search')
+
+
+class _Storage:
+    def __init__(self) -> None:
+        self.usage = {}
+        self.writes = 0
+
+    def get_api_usage(self, period: str) -> dict[str, int]:
+        return dict(self.usage.get(period, {}))
+
+    def add_api_usage(self, period: str, endpoint: str, calls: int) -> bool:
+        self.writes += 1
+        usage = self.usage.setdefault(period, {})
+        usage[endpoint] = usage.get(endpoint, 0) + calls
+        return True
+
+
+def test_api_quota_without_limits_skips_storage():
+    storage = _Storage()
+    quota = ApiQuota(daily_limit=0, monthly_limit=0, storage=storage)
+    assert all(quota.spend('search') for _ in range(10))
+    quota.close()
+    assert storage.writes == 0
+
+
+def test_api_quota_saves_usage_in_batches():
+    storage = _Storage()
+    quota = ApiQuota(
+        daily_limit=0, monthly_limit=5, storage=storage, flush_interval=60)
+    for _ in range(3):
+        assert quota.spend('search')
+    assert storage.writes == 0
+    quota.close()
+    # one write by period
+    assert storage.writes == 2
+    quota = ApiQuota(daily_limit=0, monthly_limit=5, storage=storage)
+    assert quota.spend('photos')
+    assert quota.spend('photos')
+    assert not quota.spend('photos')
+    quota.close()
@@ -0,0 +1,33 @@
+from types import SimpleNamespace
+
+import app.service as s
+import bot.dialog as d
+from classes.basic import Hotel
+
+
+HOTEL = Hotel(3001, 'Hotel', 'Street, 1', 3, 1.5)
+
+
+def _callback(hotel_id: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        data=f'{s.HISTORY_PHOTOS}:{hotel_id}:1',
+        message=SimpleNamespace(id=1))
+
+
+def test_photos_of_unknown_hotel(monkeypatch):
+    monkeypatch.setattr(
+        s.write_queue, 'flush', lambda chat_id=None: True)
+    replies = s.history_callback_replies(1, _callback(3002))
+    assert [x.text for x in replies] == [d.UNKNOWN_ERROR]
+
+
+def test_photos_of_queued_hotel(monkeypatch):
+    def flush(chat_id: int = None) -> bool:
+        s.db.add_hotel(HOTEL)
+        return True
+
+    monkeypatch.setattr(s.write_queue, 'flush', flush)
+    monkeypatch.setattr(s, '_get_hotel_photos', lambda hotel, limit: [])
+    replies = s.history_callback_replies(1, _callback(HOTEL.id))
+    assert len(replies) == 1
+    assert HOTEL.name in replies[0].text
@@ -0,0 +1,48 @@
+from datetime import datetime
+
+import pytest
+
+import app.service as s
+from classes.basic import Location
+from classes.user_session import UserSession
+
+
+OMSK = Location(2001, 2001, 'Омск, Россия', 'Омск')
+TOMSK = Location(2002, 2002, 'Томск, Россия', 'Томск')
+
+
+@pytest.fixture
+def omsk():
+    s.db.add_location(OMSK)
+    s.location_index.add(OMSK)
+
+
+def _session(chat_id: int) -> UserSession:
+    return UserSession(
+        chat_id, command='/lowprice', id=chat_id,
+        query_time=datetime(2026, 1, 1))
+
+
+def test_similar_name_is_requested_by_api(omsk, monkeypatch):
+    requested = []
+
+    def get_locations(name: str, strict: bool = False) -> list[Location]:
+        requested.append(name)
+        return [TOMSK]
+
+    monkeypatch.setattr(s.api, 'get_locations', get_locations)
+    session = _session(1)
+    s._process_location_id(session, 'Томск')
+    assert requested == ['Томск']
+    assert session.location_id == TOMSK.destination_id
+
+
+def test_similar_name_is_offered_not_selected(omsk, monkeypatch):
+    monkeypatch.setattr(
+        s.api, 'get_locations', lambda name, strict=False: [])
+    session = _session(2)
+    replies = s._process_location_id(session, 'Омскк')
+    assert session.current_step == 'location_id'
+    assert replies[-1].clarify
+    assert [x['text'] for row in replies[-1].markup.keyboard for x in row] \
+        == [OMSK.caption]
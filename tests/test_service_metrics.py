@@ -0,0 +1,32 @@
+import app.service as s
+
+
+def _queries_observed() -> tuple[int, float]:
+    stat = s.metrics.data['stats'].get(
+        'queries per update', {'count': 0, 'avg': 0.0})
+    return stat['count'], stat['count'] * stat['avg']
+
+
+def test_lazy_replies_queries_are_observed():
+    @s._observe_queries
+    def replies():
+        s.db.get_locations()
+        yield None
+        s.db.get_locations()
+
+    count, total = _queries_observed()
+    iterable = replies()
+    assert _queries_observed() == (count, total)
+    assert list(iterable) == [None]
+    assert _queries_observed() == (count + 1, total + 2)
+
+
+def test_list_replies_queries_are_observed():
+    @s._observe_queries
+    def replies():
+        s.db.get_locations()
+        return [None]
+
+    count, total = _queries_observed()
+    assert replies() == [None]
+    assert _queries_observed() == (count + 1, total + 1)
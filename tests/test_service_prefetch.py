@@ -0,0 +1,21 @@
+from concurrent.futures import Future
+
+import app.service as s
+
+
+def _prefetch(session_id: int, started: float) -> s._Prefetch:
+    prefetch = s._Prefetch(session_id, started=started)
+    prefetch.future = Future()
+    prefetch.future.set_result([])
+    return prefetch
+
+
+def test_expired_prefetches_are_forgotten_on_search(monkeypatch):
+    monkeypatch.setattr(s, 'PREFETCH_TTL', 10)
+    monkeypatch.setattr(s, '_prefetches', {
+        101: _prefetch(1, started=s.monotonic() - 20),
+        102: _prefetch(2, started=s.monotonic())})
+    monkeypatch.setattr(
+        s.api, 'iter_search_results', lambda session, cancelled=None: [])
+    s._iter_search_results(s.UserSession(103, command='/lowprice', id=3))
+    assert list(s._prefetches) == [102]
@@ -0,0 +1,55 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event
+
+import pytest
+
+from classes.rapidapi import SingleFlight
+
+
+def _wait_coalesced(flight: SingleFlight, number: int) -> None:
+    while flight.metrics.get('coalesced') < number:
+        Event().wait(0.001)
+
+
+def test_identical_calls_are_coalesced():
+    flight = SingleFlight()
+    release = Event()
+    calls = []
+
+    def func(value: int) -> int:
+        calls.append(value)
+        release.wait(5)
+        return value * 2
+
+    with ThreadPoolExecutor(3) as executor:
+        futures = [executor.submit(flight.do, 'key', func, 1)]
+        while len(calls) == 0:
+            Event().wait(0.001)
+        futures += [executor.submit(flight.do, 'key', func, 1)
+                    for _ in range(2)]
+        _wait_coalesced(flight, 2)
+        release.set()
+        assert [x.result(5) for x in futures] == [2, 2, 2]
+    assert calls == [1]
+    # finished call is not shared
+    assert flight.do('key', func, 2) == 4
+
+
+def test_error_is_raised_in_every_caller():
+    flight = SingleFlight()
+    release = Event()
+
+    def func() -> None:
+        release.wait(5)
+        raise ValueError('failed')
+
+    with ThreadPoolExecutor(2) as executor:
+        leader = executor.submit(flight.do, 'key', func)
+        while flight.metrics.get('calls') == 0:
+            Event().wait(0.001)
+        follower = executor.submit(flight.do, 'key', func)
+        _wait_coalesced(flight, 1)
+        release.set()
+        for future in (leader, follower):
+            with pytest.raises(ValueError):
+                future.result(5)
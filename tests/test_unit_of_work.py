@@ -0,0 +1,37 @@
+from classes.basic import Hotel, SearchResult
+from classes.database import DB
+
+
+def test_commit_saves_writes(tmp_path):
+    db = DB(str(tmp_path / 'test.db'))
+    uow = db.unit_of_work()
+    uow.add_hotels([Hotel(1, 'Hotel', 'Street, 1', 3, 1.5)])
+    assert uow.commit()
+    assert db.get_hotel_byid(1).name == 'Hotel'
+
+
+def test_commit_returns_false_on_data_error(tmp_path):
+    db = DB(str(tmp_path / 'test.db'))
+    uow = db.unit_of_work()
+    uow.add_hotels([Hotel(1, 'Hotel', 'Street, 1', 3, 1.5)])
+    # NOT NULL constraint failure raises DBDataError
+    uow.add_search_results([SearchResult(1, 1, 'url', None)])
+    assert uow.commit() is False
+    # writes are rolled back together
+    assert db._select_one(
+        'SELECT COUNT(*) AS n FROM hotels', [], {})['n'] == 0
+
+
+def test_missing_hotel_is_none(tmp_path):
+    db = DB(str(tmp_path / 'test.db'))
+    assert db.get_hotel_byid(1) is None
+
+
+def test_expired_negative_results_are_deleted(tmp_path):
+    db = DB(str(tmp_path / 'test.db'))
+    assert db.add_negative_result('location', 'омскк', -1)
+    assert db.add_negative_result('location', 'томскк', 60)
+    assert not db.get_negative_result('location', 'омскк')
+    assert db.get_negative_result('location', 'томскк')
+    assert db._select_one(
+        'SELECT COUNT(*) AS n FROM negative_results', [], {})['n'] == 1
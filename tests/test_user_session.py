@@ -0,0 +1,69 @@
+from copy import copy
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from classes.user_session import UserSession
+
+
+CHECK_IN = date.today() + timedelta(days=3)
+CHECK_OUT = CHECK_IN + timedelta(days=1)
+
+
+def _session(command: str) -> UserSession:
+    return UserSession(
+        1, command=command, id=1, query_time=datetime(2026, 1, 1),
+        location_id=1)
+
+
+def test_steps_are_set_in_order():
+    session = _session('/bestdeal')
+    assert session.current_step == 'check_in'
+    assert session.set_attrs({'check_out': str(CHECK_OUT)}) == {}
+    assert session.current_step == 'check_in'
+    assert session.set_attrs({'check_in': str(CHECK_IN)}) == {
+        'check_in': str(CHECK_IN)}
+    assert session.check_in == CHECK_IN
+    assert session.current_step == 'check_out'
+
+
+def test_invalid_value_keeps_step():
+    session = _session('/bestdeal')
+    session.set_attrs({'check_in': str(CHECK_IN)})
+    assert session.set_attrs({'check_out': str(CHECK_IN)}) == {}
+    assert session.current_step == 'check_out'
+    with pytest.raises(AttributeError):
+        session.check_out
+
+
+def test_lowprice_skips_price_and_distance_steps():
+    session = _session('/lowprice')
+    session.pop_changes()
+    session.set_attrs({'check_in': str(CHECK_IN)})
+    changes = session.set_attrs({'check_out': str(CHECK_OUT)})
+    assert session.current_step == 'results_num'
+    assert changes == {
+        'check_out': str(CHECK_OUT), 'price_min': 0.0, 'price_max': 0.0,
+        'distance_min': 0.0, 'distance_max': 0.0}
+    assert session.pop_changes() == {'check_in': str(CHECK_IN), **changes}
+    assert session.pop_changes() == {}
+
+
+def test_loaded_session_is_complete_without_changes():
+    session = UserSession(
+        1, command='/highprice', id=1, query_time=datetime(2026, 1, 1),
+        location_id=1, check_in=CHECK_IN, check_out=CHECK_OUT,
+        results_num=3, photos_show=False, photos_num=0)
+    assert session.current_step == 'complete'
+    assert session.price_min == 0.0
+    assert session.pop_changes() == {}
+
+
+def test_copy_keeps_set_steps_only():
+    session = _session('/bestdeal')
+    session.set_attrs({'check_in': str(CHECK_IN)})
+    session_copy = copy(session)
+    session_copy.set_attrs({'check_out': str(CHECK_OUT)})
+    assert session_copy.current_step == 'price_min'
+    assert session.current_step == 'check_out'
+    assert session_copy.pop_changes() == {'check_out': str(CHECK_OUT)}
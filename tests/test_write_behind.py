@@ -0,0 +1,67 @@
+from threading import Event
+
+from classes.basic import Hotel
+from classes.database import DB
+from classes.write_behind import WriteBehindQueue
+
+
+def _uow(db: DB, id: int):
+    uow = db.unit_of_work()
+    uow.add_hotels([Hotel(id, f'Hotel {id}', 'Street, 1', 3, 1.5)])
+    return uow
+
+
+def test_writer_survives_batch_exception(tmp_path, monkeypatch):
+    db = DB(str(tmp_path / 'test.db'))
+    queue = WriteBehindQueue(db, 10, 1)
+    commit = queue._commit
+    calls = []
+
+    def failing_commit(batch):
+        calls.append(len(batch))
+        if len(calls) == 1:
+            raise RuntimeError('commit failed')
+        commit(batch)
+
+    monkeypatch.setattr(queue, '_commit', failing_commit)
+    assert queue.put(_uow(db, 1))
+    assert queue.flush(1)
+    assert queue.put(_uow(db, 2))
+    assert queue.flush(1)
+    assert calls == [1, 1]
+    assert db.get_hotel_byid(2).name == 'Hotel 2'
+    assert queue.metrics.get('errors') == 1
+    queue.close(1)
+
+
+def test_flush_returns_false_on_timeout(tmp_path, monkeypatch):
+    db = DB(str(tmp_path / 'test.db'))
+    queue = WriteBehindQueue(db, 10, 1)
+    release = Event()
+    commit = queue._commit
+    monkeypatch.setattr(
+        queue, '_commit', lambda batch: release.wait(5) and commit(batch))
+    assert queue.put(_uow(db, 1))
+    assert queue.flush(0.1) is False
+    release.set()
+    assert queue.flush(1)
+    assert db.get_hotel_byid(1) is not None
+    queue.close(1)
+
+
+def test_flush_waits_for_units_of_chat_only(tmp_path, monkeypatch):
+    db = DB(str(tmp_path / 'test.db'))
+    queue = WriteBehindQueue(db, 10, 1)
+    release = Event()
+    commit = queue._commit
+    monkeypatch.setattr(
+        queue, '_commit', lambda batch: release.wait(5) and commit(batch))
+    assert queue.put(_uow(db, 1), chat_id=1)
+    assert queue.put(_uow(db, 2), chat_id=2)
+    # chat without queued units does not wait for other chats
+    assert queue.flush(0.1, chat_id=3)
+    assert queue.flush(0.1, chat_id=2) is False
+    release.set()
+    assert queue.flush(1, chat_id=2)
+    assert db.get_hotel_byid(2) is not None
+    queue.close(1)